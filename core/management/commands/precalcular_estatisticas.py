@@ -0,0 +1,49 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from core.models import Entrega, Rota, EstatisticaDiaria
+
+class Command(BaseCommand):
+    help = 'Pré-calcula as estatísticas diárias usadas pelos relatórios de período longo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=35,
+            help='Quantos dias para trás recalcular (padrão: 35, cobre o período "mes")'
+        )
+
+    def handle(self, *args, **options):
+        hoje = timezone.now().date()
+
+        # Recalcula (upsert) cada dia fechado: status de entregas antigas
+        # ainda muda, então a rodada noturna corrige os dias anteriores
+        for delta in range(1, options['dias'] + 1):
+            dia = hoje - timedelta(days=delta)
+
+            stats = Entrega.objects.filter(data_solicitacao__date=dia).aggregate(
+                total=Count('id'),
+                concluidas=Count('id', filter=Q(status='entregue')),
+                pendentes=Count('id', filter=Q(status='pendente')),
+            )
+            rotas_concluidas = Rota.objects.filter(
+                data_rota=dia, status='concluida'
+            ).count()
+
+            EstatisticaDiaria.objects.update_or_create(
+                data=dia,
+                defaults={
+                    'entregas_total': stats['total'],
+                    'entregas_concluidas': stats['concluidas'],
+                    'entregas_pendentes': stats['pendentes'],
+                    'rotas_concluidas': rotas_concluidas,
+                }
+            )
+
+        if options['verbosity'] > 0:
+            self.stdout.write(self.style.SUCCESS(
+                f'Estatísticas recalculadas para {options["dias"]} dias'
+            ))
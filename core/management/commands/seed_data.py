@@ -123,9 +123,10 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('ℹ️  Clientes já existem, pulando...'))
             return Cliente.objects.all()[:self.count]
         
-        clientes = []
-        for i in range(self.count):
-            cliente = Cliente.objects.create(
+        # Cliente não tem lógica em save(), então um único bulk_create
+        # substitui um INSERT por registro
+        clientes = Cliente.objects.bulk_create([
+            Cliente(
                 nome=random.choice(self.NOMES_CLIENTES[:self.count]),
                 email=f"cliente{i+1:03d}@email.com",
                 telefone=f"(11) 9{random.randint(1000, 9999)}-{random.randint(1000, 9999)}",
@@ -134,8 +135,9 @@ class Command(BaseCommand):
                 cep=f"0100{i+1:02d}-000",
                 data_cadastro=timezone.now() - timedelta(days=random.randint(1, 365))
             )
-            clientes.append(cliente)
-        
+            for i in range(self.count)
+        ])
+
         self.stdout.write(self.style.SUCCESS(f'✅ {self.count} clientes criados'))
         return clientes
     
@@ -188,25 +190,25 @@ class Command(BaseCommand):
         
         veiculos = []
         tipos = [TipoVeiculo.CARRO, TipoVeiculo.VAN, TipoVeiculo.CAMINHAO]
-        
+
         # Placas fictícias
         letras = ['ABC', 'DEF', 'GHI', 'JKL', 'MNO', 'PQR', 'STU', 'VWX', 'YZ']
-        
+
         for i in range(self.count):
             tipo = random.choice(tipos)
             marca = random.choice(self.MARCAS)
             modelo = random.choice(self.MODELOS[tipo])
-            
+
             # Escolher um motorista aleatório (alguns veículos sem motorista)
             motorista = random.choice(motoristas + [None]) if motoristas else None
-            
-            veiculo = Veiculo.objects.create(
+
+            veiculo = Veiculo(
                 placa=f"{random.choice(letras)}{random.randint(1000, 9999)}",
                 modelo=modelo,
                 marca=marca,
                 tipo=tipo,
-                capacidade_maxima=random.choice([50, 100, 200, 500, 1000]) 
-                                if tipo == TipoVeiculo.CAMINHAO else 
+                capacidade_maxima=random.choice([50, 100, 200, 500, 1000])
+                                if tipo == TipoVeiculo.CAMINHAO else
                                 random.choice([10, 20, 30]) if tipo == TipoVeiculo.VAN else 5,
                 ano_fabricacao=random.randint(2015, 2023),
                 km_atual=Decimal(random.uniform(1000, 150000)),
@@ -215,7 +217,10 @@ class Command(BaseCommand):
                 data_cadastro=timezone.now() - timedelta(days=random.randint(1, 730))
             )
             veiculos.append(veiculo)
-        
+
+        # Veiculo também não tem lógica em save(): um único INSERT em lote
+        veiculos = Veiculo.objects.bulk_create(veiculos)
+
         self.stdout.write(self.style.SUCCESS(f'✅ {self.count} veículos criados'))
         return veiculos
     
@@ -299,11 +304,11 @@ class Command(BaseCommand):
             # Adicionar entregas à rota (após criar a rota)
             if entregas_rota:
                 rota.entregas.set(entregas_rota)
-            
-                # Atualizar as entregas com a rota
-                for entrega in entregas_rota:
-                    entrega.rota = rota
-                    entrega.save()
+
+                # Atualizar as entregas com a rota em um único UPDATE
+                Entrega.objects.filter(
+                    pk__in=[entrega.pk for entrega in entregas_rota]
+                ).update(rota=rota)
             
             rotas.append(rota)
         
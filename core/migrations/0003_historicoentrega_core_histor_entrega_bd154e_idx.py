@@ -0,0 +1,17 @@
+# Generated by Django 5.2.17 on 2026-08-31 04:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_motorista_usuario'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicoentrega',
+            index=models.Index(fields=['entrega', '-data_atualizacao'], name='core_histor_entrega_bd154e_idx'),
+        ),
+    ]
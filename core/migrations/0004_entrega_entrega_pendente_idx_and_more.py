@@ -0,0 +1,29 @@
+# Generated by Django 5.2.17 on 2026-08-31 04:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_historicoentrega_core_histor_entrega_bd154e_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entrega',
+            index=models.Index(condition=models.Q(('status', 'pendente')), fields=['status'], name='entrega_pendente_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entrega',
+            index=models.Index(condition=models.Q(('status', 'entregue')), fields=['status'], name='entrega_entregue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rota',
+            index=models.Index(condition=models.Q(('status', 'em_andamento')), fields=['status'], name='rota_em_andamento_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='veiculo',
+            index=models.Index(condition=models.Q(('status', 'disponivel')), fields=['status'], name='veiculo_disponivel_idx'),
+        ),
+    ]
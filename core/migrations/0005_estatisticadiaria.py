@@ -0,0 +1,30 @@
+# Generated by Django 5.2.17 on 2026-08-31 04:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_entrega_entrega_pendente_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstatisticaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(unique=True, verbose_name='Data')),
+                ('entregas_total', models.PositiveIntegerField(default=0, verbose_name='Entregas Solicitadas')),
+                ('entregas_concluidas', models.PositiveIntegerField(default=0, verbose_name='Entregas Concluídas')),
+                ('entregas_pendentes', models.PositiveIntegerField(default=0, verbose_name='Entregas Pendentes')),
+                ('rotas_concluidas', models.PositiveIntegerField(default=0, verbose_name='Rotas Concluídas')),
+                ('data_calculo', models.DateTimeField(auto_now=True, verbose_name='Data do Cálculo')),
+            ],
+            options={
+                'verbose_name': 'Estatística Diária',
+                'verbose_name_plural': 'Estatísticas Diárias',
+                'ordering': ['-data'],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.17 on 2026-08-31 04:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_estatisticadiaria'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entrega',
+            index=models.Index(fields=['status', 'data_solicitacao'], name='core_entreg_status_3605fd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entrega',
+            index=models.Index(fields=['status', 'motorista'], name='core_entreg_status_61ed22_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entrega',
+            index=models.Index(fields=['status', 'rota'], name='core_entreg_status_621865_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='motorista',
+            index=models.Index(fields=['status'], name='core_motori_status_5ccc11_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rota',
+            index=models.Index(fields=['status', 'data_rota'], name='core_rota_status_26bfdc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rota',
+            index=models.Index(fields=['motorista', 'status'], name='core_rota_motoris_bbbaa4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='veiculo',
+            index=models.Index(fields=['status'], name='core_veicul_status_f818c3_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.17 on 2026-08-31 05:04
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_entrega_core_entreg_status_3605fd_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='entrega',
+            name='core_entreg_codigo__82652d_idx',
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.17 on 2026-08-31 05:11
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_remove_entrega_core_entreg_codigo__82652d_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='entrega',
+            name='core_entreg_status_990eb1_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='entrega',
+            name='entrega_pendente_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='entrega',
+            name='entrega_entregue_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='rota',
+            name='rota_em_andamento_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='veiculo',
+            name='veiculo_disponivel_idx',
+        ),
+    ]
@@ -88,6 +88,10 @@ class Motorista(models.Model):
         verbose_name = "Motorista"
         verbose_name_plural = "Motoristas"
         ordering = ['nome']
+        indexes = [
+            # Relatórios contam motoristas por status a cada requisição
+            models.Index(fields=['status']),
+        ]
     
     def __str__(self):
         return f"{self.nome} - {self.cpf}"
@@ -156,6 +160,11 @@ class Veiculo(models.Model):
         verbose_name = "Veículo"
         verbose_name_plural = "Veículos"
         ordering = ['placa']
+        indexes = [
+            # Um índice só de status atende frota disponível e as contagens
+            # de em_uso/manutencao dos relatórios
+            models.Index(fields=['status']),
+        ]
     
     def __str__(self):
         return f"{self.placa} - {self.modelo} ({self.tipo})"
@@ -222,9 +231,15 @@ class Entrega(models.Model):
         verbose_name_plural = "Entregas"
         ordering = ['-data_solicitacao']
         indexes = [
-            models.Index(fields=['codigo_rastreio']),
-            models.Index(fields=['status']),
+            # codigo_rastreio já tem índice único pelo unique=True do campo
             models.Index(fields=['data_entrega_prevista']),
+            # Compostos alinhados aos predicados dos relatórios/dashboards:
+            # contagens por status recortadas por data, motorista ou rota.
+            # O prefixo status deles também atende os filtros só por status,
+            # dispensando índice simples ou parciais na coluna
+            models.Index(fields=['status', 'data_solicitacao']),
+            models.Index(fields=['status', 'motorista']),
+            models.Index(fields=['status', 'rota']),
         ]
     
     def __str__(self):
@@ -235,10 +250,14 @@ class Entrega(models.Model):
         if self.status == StatusEntrega.ENTREGUE and not self.data_entrega_real:
             self.data_entrega_real = timezone.now()
 
-                # Garantir que tem código de rastreio
+        # Garantir que tem código de rastreio, sempre em maiúsculas: as
+        # views normalizam o parâmetro com upper(), então o valor gravado
+        # precisa casar com o índice único sem lookup case-insensitive
         if not self.codigo_rastreio:
             self.codigo_rastreio = generate_codigo_rastreio()
-        
+        else:
+            self.codigo_rastreio = self.codigo_rastreio.upper()
+
         super().save(*args, **kwargs)
 
 class Rota(models.Model):
@@ -305,6 +324,13 @@ class Rota(models.Model):
         verbose_name = "Rota"
         verbose_name_plural = "Rotas"
         ordering = ['-data_rota', 'nome']
+        indexes = [
+            # Relatórios filtram rotas concluídas por data; as actions do
+            # motorista filtram as rotas dele por status. O prefixo status
+            # de (status, data_rota) também cobre os filtros só por status
+            models.Index(fields=['status', 'data_rota']),
+            models.Index(fields=['motorista', 'status']),
+        ]
     
     def __str__(self):
         return f"{self.nome} - {self.data_rota}"
@@ -360,6 +386,34 @@ class HistoricoEntrega(models.Model):
         verbose_name = "Histórico de Entrega"
         verbose_name_plural = "Históricos de Entrega"
         ordering = ['-data_atualizacao']
+        indexes = [
+            # Cobre entrega.historico.all() já na ordem reverso-cronológica
+            models.Index(fields=['entrega', '-data_atualizacao']),
+        ]
     
     def __str__(self):
-        return f"Histórico {self.entrega.codigo_rastreio} - {self.data_atualizacao}"
\ No newline at end of file
+        return f"Histórico {self.entrega.codigo_rastreio} - {self.data_atualizacao}"
+
+class EstatisticaDiaria(models.Model):
+    """
+    Resumo pré-calculado por dia para os relatórios de período longo.
+
+    Alimentado pelo comando precalcular_estatisticas (rodado à noite via
+    cron): COUNT(*) com filtro de data em Entrega degrada quando a tabela
+    cresce, e os dias já fechados não precisam ser recontados a cada
+    requisição do relatório.
+    """
+    data = models.DateField(unique=True, verbose_name="Data")
+    entregas_total = models.PositiveIntegerField(default=0, verbose_name="Entregas Solicitadas")
+    entregas_concluidas = models.PositiveIntegerField(default=0, verbose_name="Entregas Concluídas")
+    entregas_pendentes = models.PositiveIntegerField(default=0, verbose_name="Entregas Pendentes")
+    rotas_concluidas = models.PositiveIntegerField(default=0, verbose_name="Rotas Concluídas")
+    data_calculo = models.DateTimeField(auto_now=True, verbose_name="Data do Cálculo")
+
+    class Meta:
+        verbose_name = "Estatística Diária"
+        verbose_name_plural = "Estatísticas Diárias"
+        ordering = ['-data']
+
+    def __str__(self):
+        return f"Estatísticas de {self.data}"
@@ -80,16 +80,13 @@ class IsAdministradorOuMotoristaDaRota(permissions.BasePermission):
         # Administradores têm acesso
         if request.user and request.user.is_staff:
             return True
-        
-        # Motoristas só podem acessar suas próprias rotas
-        if request.user and request.user.is_authenticated:
-            try:
-                motorista = Motorista.objects.get(usuario=request.user)
-                return obj.motorista == motorista
-            except Motorista.DoesNotExist:
-                pass
-        
-        return False
+
+        # Compara pela FK já carregada (o queryset faz select_related de
+        # motorista), sem SELECT de Motorista por requisição
+        return (
+            obj.motorista is not None
+            and obj.motorista.usuario_id == request.user.id
+        )
 
 class FiltroMotorista(permissions.BasePermission):
     """
@@ -1,9 +1,12 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.contrib.auth.models import User
-from .models import Motorista
+from django.utils import timezone
+from .models import Motorista, Entrega, HistoricoEntrega, Rota, Veiculo
 
-@receiver(post_save, sender=Motorista)
 def criar_usuario_motorista(sender, instance, created, **kwargs):
     """
     Cria usuário automaticamente quando um motorista é criado.
@@ -28,4 +31,105 @@ def criar_usuario_motorista(sender, instance, created, **kwargs):
         )
         
         instance.usuario = user
-        instance.save(update_fields=['usuario'])
\ No newline at end of file
+        instance.save(update_fields=['usuario'])
+
+# Motorista.save() já garante a criação do usuário; o signal cobre apenas
+# caminhos que gravam sem passar pelo save() do modelo. Nos testes ele é
+# desligado via settings para não duplicar trabalho a cada INSERT.
+if getattr(settings, 'CORE_AUTO_CRIAR_USUARIO_MOTORISTA', True):
+    post_save.connect(criar_usuario_motorista, sender=Motorista)
+
+
+def invalidar_cache_rastreio(sender, instance, **kwargs):
+    """
+    Remove do cache a resposta do rastreamento público quando a entrega ou
+    seu histórico mudam. Caminhos de escrita que usam queryset.update() /
+    bulk_create() não disparam post_save e invalidam a chave diretamente
+    na view; o TTL de 60s limita a janela de dado velho nos demais casos.
+    """
+    entrega = instance if sender is Entrega else instance.entrega
+    if entrega.codigo_rastreio:
+        cache.delete_many([
+            f'rastreio:{entrega.codigo_rastreio}',
+            f'rastreio-publico:{entrega.codigo_rastreio}',
+        ])
+
+post_save.connect(invalidar_cache_rastreio, sender=Entrega)
+post_save.connect(invalidar_cache_rastreio, sender=HistoricoEntrega)
+
+
+def invalidar_cache_dashboard_motorista(sender, instance, **kwargs):
+    """
+    Derruba o dashboard cacheado (visao_completa) do motorista quando uma
+    entrega ou rota dele muda. Escritas via update()/bulk_* não passam por
+    aqui; o TTL curto (30s) limita a janela de dado velho nesses casos.
+    """
+    if instance.motorista_id:
+        cache.delete(f'motorista_dashboard:{instance.motorista_id}')
+
+post_save.connect(invalidar_cache_dashboard_motorista, sender=Entrega)
+post_save.connect(invalidar_cache_dashboard_motorista, sender=Rota)
+
+
+def _recalcular_capacidade_rotas(rota_ids):
+    """
+    Regrava capacidade_total_utilizada das rotas informadas com um único
+    UPDATE, somando as entregas via subquery no banco.
+    """
+    Rota.objects.filter(pk__in=rota_ids).update(
+        capacidade_total_utilizada=Coalesce(
+            Subquery(
+                Entrega.objects.filter(rotas_associadas=OuterRef('pk'))
+                .values('rotas_associadas')
+                .annotate(soma=Sum('capacidade_necessaria'))
+                .values('soma')
+            ),
+            Value(0),
+        )
+    )
+
+
+def atualizar_capacidade_rota(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Mantém a coluna denormalizada capacidade_total_utilizada sempre que o
+    M2M rota/entregas muda. Centralizar aqui dispensa cada view de
+    incrementar/decrementar manualmente e cobre escritas fora das actions
+    (admin, shell); o recálculo é absoluto, então nunca acumula desvio.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        rota_ids = pk_set or []
+    else:
+        rota_ids = [instance.pk]
+    if rota_ids:
+        _recalcular_capacidade_rotas(rota_ids)
+
+m2m_changed.connect(atualizar_capacidade_rota, sender=Rota.entregas.through)
+
+
+def atualizar_capacidade_rota_apos_exclusao(sender, instance, **kwargs):
+    """
+    Excluir uma entrega apaga as linhas do M2M sem disparar m2m_changed;
+    recalcula a rota à qual ela estava vinculada pela FK.
+    """
+    if instance.rota_id:
+        _recalcular_capacidade_rotas([instance.rota_id])
+
+post_delete.connect(atualizar_capacidade_rota_apos_exclusao, sender=Entrega)
+
+
+def invalidar_cache_relatorios(sender, **kwargs):
+    """
+    Derruba os relatórios do admin cacheados por período. As chaves levam a
+    data, então só as de hoje precisam ser apagadas; as de dias anteriores
+    nunca mais são consultadas e expiram pelo TTL.
+    """
+    hoje = timezone.now().date().isoformat()
+    cache.delete_many([
+        f'relatorios:{periodo}:{hoje}' for periodo in ('hoje', 'semana', 'mes')
+    ])
+
+for _model in (Entrega, Rota, Veiculo, Motorista):
+    post_save.connect(invalidar_cache_relatorios, sender=_model)
+    post_delete.connect(invalidar_cache_relatorios, sender=_model)
\ No newline at end of file
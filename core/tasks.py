@@ -0,0 +1,27 @@
+"""
+Tarefas de escrita fora do caminho crítico das views.
+
+O projeto não usa fila de tarefas (Celery/RQ). Estas funções centralizam
+escritas de auditoria que não precisam ter sido confirmadas antes do 200 OK;
+hoje executam de forma síncrona, e ao adotar uma fila basta decorá-las com
+@shared_task e trocar as chamadas por .delay() sem mexer nas views.
+"""
+from .models import HistoricoEntrega
+
+
+def registrar_historico_entrega(entrega_id, status_anterior, status_novo,
+                                observacao='', motorista_id=None):
+    """
+    Grava uma linha de HistoricoEntrega. Recebe apenas ids e valores
+    escalares (serializáveis) para que a assinatura já sirva como payload
+    de uma fila de tarefas.
+    """
+    HistoricoEntrega.objects.bulk_create([
+        HistoricoEntrega(
+            entrega_id=entrega_id,
+            status_anterior=status_anterior,
+            status_novo=status_novo,
+            observacao=observacao,
+            motorista_id=motorista_id,
+        )
+    ])
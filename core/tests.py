@@ -1,42 +1,133 @@
+"""
+Testes da API do sistema de logística.
+
+Estratégia de fixtures: a massa de dados compartilhada vive em
+setUpTestData (escopo de classe), que é o mecanismo nativo do Django para
+amortizar o custo de seed — cada teste roda num savepoint e o estado entre
+classes fica isolado, o que também permite --parallel. Fixtures de escopo
+de sessão (estilo pytest-django) dariam um ganho marginal aqui, mas
+exigiriam uma dependência nova e quebrariam o isolamento entre classes.
+"""
 import json
+from django.core.cache import cache
 from django.test import TestCase
 from django.contrib.auth.models import User
-from django.urls import reverse
-from rest_framework.test import APITestCase, APIClient
+from django.urls import reverse, reverse_lazy
+from rest_framework.test import (
+    APITestCase, APIRequestFactory, force_authenticate
+)
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
 
+from django.core.management import call_command
 from .models import (
     Cliente, Motorista, Veiculo, Entrega, Rota, HistoricoEntrega,
     StatusEntrega, StatusMotorista, TipoVeiculo, StatusVeiculo,
-    StatusRota, TipoCNH
+    StatusRota, TipoCNH, EstatisticaDiaria
 )
-
+from .views import EntregaViewSet, RotaViewSet
+
+# URLs estáticas resolvidas uma única vez (reverse_lazy adia a resolução
+# para depois do carregamento do URLconf). As rotas parametrizadas
+# continuam com reverse(..., args=[...]) no próprio teste.
+LOGIN_URL = reverse_lazy('token_obtain_pair')
+CLIENTE_LIST_URL = reverse_lazy('cliente-list')
+MOTORISTA_LIST_URL = reverse_lazy('motorista-list')
+VEICULO_LIST_URL = reverse_lazy('veiculo-list')
+ENTREGA_LIST_URL = reverse_lazy('entrega-list')
+ROTA_LIST_URL = reverse_lazy('rota-list')
+RASTREIO_URL = reverse_lazy('entrega-por-codigo-rastreio')
+RELATORIOS_URL = reverse_lazy('relatorios')
+
+# Data de referência calculada uma única vez no import do módulo, em vez de
+# chamar timezone.now().date() em cada teste. Precisa ser a data corrente
+# (e não uma data fixa) porque o serializer de entrega valida "data no
+# passado" contra a data real.
+TODAY = timezone.now().date()
+
+# Payloads reutilizados pelos testes de criação. Construídos uma única vez
+# no import do módulo; testes que precisam variar algum campo devem copiar
+# com dict(PAYLOAD, campo='outro valor').
+NOVO_CLIENTE_PAYLOAD = {
+    'nome': 'Novo Cliente',
+    'email': 'novo@test.com',
+    'telefone': '11777777777',
+    'cpf_cnpj': '56789012345678',
+    'endereco': 'Rua Nova, 456',
+    'cep': '09876543'
+}
+
+NOVO_MOTORISTA_PAYLOAD = {
+    'nome': 'Novo Motorista',
+    'cpf': '98765432100',
+    'cnh': 'C',
+    'cnh_numero': '987654321',
+    'telefone': '11666666666',
+    'email': 'novo_motorista@test.com',
+    'data_nascimento': '1990-01-01'
+}
+
+NOVO_VEICULO_PAYLOAD = {
+    'placa': 'XYZ9999',
+    'modelo': 'Uno',
+    'marca': 'Fiat',
+    'tipo': 'carro',
+    'capacidade_maxima': 80,
+    'ano_fabricacao': 2019
+}
+
+# Partes invariantes dos payloads de entrega/rota, pré-serializadas
+# (isoformat) no import. Os testes completam apenas os ids e os campos que
+# variam: {**NOVA_ENTREGA_PAYLOAD, 'cliente_id': self.cliente.id, ...}
+NOVA_ENTREGA_PAYLOAD = {
+    'endereco_origem': 'Rua Origem, 100',
+    'endereco_destino': 'Rua Destino, 200',
+    'cep_origem': '01234000',
+    'cep_destino': '01235000',
+    'capacidade_necessaria': 30,
+    'valor_frete': '200.00',
+    'data_entrega_prevista': (TODAY + timedelta(days=3)).isoformat()
+}
+
+NOVA_ROTA_PAYLOAD = {
+    'nome': 'Nova Rota',
+    'data_rota': TODAY.isoformat()
+}
 
 class BaseTestCase(APITestCase):
-    """Classe base com configurações comuns para todos os testes"""
+    """Classe base com configurações comuns para todos os testes.
 
-    def setUp(self):
-        """Configuração inicial para todos os testes"""
-        self.client = APIClient()
+    A massa de dados imutável é criada uma única vez por classe em
+    setUpTestData; cada teste roda dentro de um savepoint que é desfeito ao
+    final, então mutações no banco não vazam entre testes.
 
+    Requer Django >= 3.2: o descritor TestData faz deepcopy das instâncias
+    (cls.entrega, cls.rota etc.) no acesso via self, isolando também as
+    mutações em memória entre testes. Em versões anteriores seria preciso
+    recarregar os objetos manualmente em setUp.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """Massa de dados compartilhada por todos os testes da classe"""
         # Criar usuários de teste
-        self.admin_user = User.objects.create_superuser(
+        cls.admin_user = User.objects.create_superuser(
             username='admin',
             email='admin@test.com',
             password='admin123'
         )
 
-        self.motorista_user = User.objects.create_user(
+        cls.motorista_user = User.objects.create_user(
             username='motorista1',
             email='motorista@test.com',
             password='motorista123'
         )
 
         # Criar motorista associado ao usuário
-        self.motorista = Motorista.objects.create(
+        cls.motorista = Motorista.objects.create(
             nome='João Motorista',
             cpf='12345678901',
             cnh='B',
@@ -44,20 +135,23 @@ class BaseTestCase(APITestCase):
             telefone='11999999999',
             email='motorista@test.com',
             status=StatusMotorista.ATIVO,
-            usuario=self.motorista_user
+            usuario=cls.motorista_user
         )
 
-        # Criar dados de teste
-        self.cliente = Cliente.objects.create(
+        # Criar dados de teste. Cliente e Veiculo não têm lógica em save(),
+        # então podem ser inseridos via bulk_create (menos round-trips no
+        # banco); Motorista e Entrega precisam de .create() por causa da
+        # criação de usuário e do código de rastreio gerados em save().
+        cls.cliente, = Cliente.objects.bulk_create([Cliente(
             nome='Cliente Teste',
             email='cliente@test.com',
             telefone='11888888888',
             cpf_cnpj='12345678901234',
             endereco='Rua Teste, 123',
             cep='01234567'
-        )
+        )])
 
-        self.veiculo = Veiculo.objects.create(
+        cls.veiculo, = Veiculo.objects.bulk_create([Veiculo(
             placa='ABC1234',
             modelo='Gol',
             marca='Volkswagen',
@@ -65,45 +159,47 @@ class BaseTestCase(APITestCase):
             capacidade_maxima=100,
             ano_fabricacao=2020,
             status=StatusVeiculo.DISPONIVEL
-        )
+        )])
 
-        self.entrega = Entrega.objects.create(
-            cliente=self.cliente,
+        cls.entrega = Entrega.objects.create(
+            cliente=cls.cliente,
             endereco_origem='Rua Origem, 100',
             endereco_destino='Rua Destino, 200',
             cep_origem='01234000',
             cep_destino='01235000',
             capacidade_necessaria=50,
             valor_frete=Decimal('150.00'),
-            data_entrega_prevista=timezone.now().date() + timedelta(days=2)
+            data_entrega_prevista=TODAY + timedelta(days=2)
         )
 
-        self.rota = Rota.objects.create(
+        cls.rota = Rota.objects.create(
             nome='Rota Teste',
-            motorista=self.motorista,
-            veiculo=self.veiculo,
-            data_rota=timezone.now().date()
+            motorista=cls.motorista,
+            veiculo=cls.veiculo,
+            data_rota=TODAY
         )
 
+        # Tokens JWT gerados uma única vez por classe: evita o POST de login
+        # (hash de senha + assinatura) em cada teste, mantendo o caminho real
+        # de autenticação por header Bearer. O fluxo completo de login
+        # continua coberto por AuthenticationTests.
+        cls.admin_token = str(AccessToken.for_user(cls.admin_user))
+        cls.motorista_token = str(AccessToken.for_user(cls.motorista_user))
+
+    def setUp(self):
+        # O LocMem é global ao processo e sobrevive ao rollback do banco;
+        # como o SQLite reusa pks entre classes, uma entrada cacheada
+        # (motorista_dashboard:<pk>, relatorios:<periodo>:<data>...) de uma
+        # classe poderia ser servida na seguinte. Limpa antes de cada teste
+        cache.clear()
+
     def authenticate_admin(self):
         """Autentica como administrador"""
-        response = self.client.post(reverse('token_obtain_pair'), {
-            'username': 'admin',
-            'password': 'admin123'
-        })
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        token = response.data['access']
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.admin_token}')
 
     def authenticate_motorista(self):
         """Autentica como motorista"""
-        response = self.client.post(reverse('token_obtain_pair'), {
-            'username': 'motorista1',
-            'password': 'motorista123'
-        })
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
-        token = response.data['access']
-        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.motorista_token}')
 
     def clear_authentication(self):
         """Remove autenticação"""
@@ -115,7 +211,7 @@ class AuthenticationTests(BaseTestCase):
 
     def test_login_admin_success(self):
         """Testa login bem-sucedido do admin"""
-        response = self.client.post(reverse('token_obtain_pair'), {
+        response = self.client.post(LOGIN_URL, {
             'username': 'admin',
             'password': 'admin123'
         })
@@ -126,7 +222,7 @@ class AuthenticationTests(BaseTestCase):
 
     def test_login_motorista_success(self):
         """Testa login bem-sucedido do motorista"""
-        response = self.client.post(reverse('token_obtain_pair'), {
+        response = self.client.post(LOGIN_URL, {
             'username': 'motorista1',
             'password': 'motorista123'
         })
@@ -136,7 +232,7 @@ class AuthenticationTests(BaseTestCase):
 
     def test_login_invalid_credentials(self):
         """Testa login com credenciais inválidas"""
-        response = self.client.post(reverse('token_obtain_pair'), {
+        response = self.client.post(LOGIN_URL, {
             'username': 'admin',
             'password': 'wrongpassword'
         })
@@ -144,16 +240,13 @@ class AuthenticationTests(BaseTestCase):
 
     def test_refresh_token(self):
         """Testa refresh de token"""
-        # Primeiro login
-        response = self.client.post(reverse('token_obtain_pair'), {
-            'username': 'admin',
-            'password': 'admin123'
-        })
-        refresh_token = response.data['refresh']
+        # Gera o refresh token direto em memória (o fluxo completo de login
+        # já é coberto por test_login_admin_success)
+        refresh_token = RefreshToken.for_user(self.admin_user)
 
         # Refresh token
         response = self.client.post(reverse('token_refresh'), {
-            'refresh': refresh_token
+            'refresh': str(refresh_token)
         })
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('access', response.data)
@@ -165,7 +258,7 @@ class ClienteTests(BaseTestCase):
     def test_list_clientes_admin(self):
         """Admin pode listar todos os clientes"""
         self.authenticate_admin()
-        response = self.client.get(reverse('cliente-list'))
+        response = self.client.get(CLIENTE_LIST_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertGreaterEqual(len(response.data), 1)
 
@@ -186,7 +279,7 @@ class ClienteTests(BaseTestCase):
         self.entrega.save()
 
         self.authenticate_motorista()
-        response = self.client.get(reverse('cliente-list'))
+        response = self.client.get(CLIENTE_LIST_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         
         # Verificar que apenas o cliente da entrega do motorista é retornado
@@ -199,30 +292,14 @@ class ClienteTests(BaseTestCase):
     def test_create_cliente_admin(self):
         """Admin pode criar cliente"""
         self.authenticate_admin()
-        data = {
-            'nome': 'Novo Cliente',
-            'email': 'novo@test.com',
-            'telefone': '11777777777',
-            'cpf_cnpj': '56789012345678',
-            'endereco': 'Rua Nova, 456',
-            'cep': '09876543'
-        }
-        response = self.client.post(reverse('cliente-list'), data)
+        response = self.client.post(CLIENTE_LIST_URL, NOVO_CLIENTE_PAYLOAD)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['nome'], 'Novo Cliente')
 
     def test_create_cliente_motorista_forbidden(self):
         """Motorista não pode criar cliente"""
         self.authenticate_motorista()
-        data = {
-            'nome': 'Novo Cliente',
-            'email': 'novo@test.com',
-            'telefone': '11777777777',
-            'cpf_cnpj': '56789012345678',
-            'endereco': 'Rua Nova, 456',
-            'cep': '09876543'
-        }
-        response = self.client.post(reverse('cliente-list'), data)
+        response = self.client.post(CLIENTE_LIST_URL, NOVO_CLIENTE_PAYLOAD)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
     def test_retrieve_cliente_admin(self):
@@ -250,17 +327,32 @@ class ClienteTests(BaseTestCase):
 class MotoristaTests(BaseTestCase):
     """Testes para Motorista"""
 
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Motorista "de terceiro" compartilhado pelos testes de permissão da
+        # classe: criado uma única vez em vez de um INSERT por teste
+        cls.outro_motorista = Motorista.objects.create(
+            nome='Outro Motorista',
+            cpf='11111111111',
+            cnh='B',
+            cnh_numero='111111111',
+            telefone='11222222222',
+            email='outro@test.com',
+            status=StatusMotorista.ATIVO
+        )
+
     def test_list_motoristas_admin(self):
         """Admin pode listar todos os motoristas"""
         self.authenticate_admin()
-        response = self.client.get(reverse('motorista-list'))
+        response = self.client.get(MOTORISTA_LIST_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertGreaterEqual(len(response.data), 1)
 
     def test_list_motoristas_motorista(self):
         """Motorista pode listar apenas ele mesmo"""
         self.authenticate_motorista()
-        response = self.client.get(reverse('motorista-list'))
+        response = self.client.get(MOTORISTA_LIST_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.data['results'][0]['id'], self.motorista.id)
@@ -275,16 +367,7 @@ class MotoristaTests(BaseTestCase):
     def test_create_motorista_admin(self):
         """Admin pode criar motorista"""
         self.authenticate_admin()
-        data = {
-            'nome': 'Novo Motorista',
-            'cpf': '98765432100',
-            'cnh': 'C',
-            'cnh_numero': '987654321',
-            'telefone': '11666666666',
-            'email': 'novo_motorista@test.com',
-            'data_nascimento': '1990-01-01'
-        }
-        response = self.client.post(reverse('motorista-list'), data)
+        response = self.client.post(MOTORISTA_LIST_URL, NOVO_MOTORISTA_PAYLOAD)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['nome'], 'Novo Motorista')
 
@@ -296,24 +379,14 @@ class MotoristaTests(BaseTestCase):
         self.authenticate_motorista()
         response = self.client.get(reverse('motorista-entregas', args=[self.motorista.id]))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
     def test_motorista_entregas_other_forbidden(self):
-        """Motorista não pode ver entregas de outro motorista"""
-        # Criar outro motorista
-        outro_motorista = Motorista.objects.create(
-            nome='Outro Motorista',
-            cpf='11111111111',
-            cnh='B',
-            cnh_numero='111111111',
-            telefone='11222222222',
-            email='outro@test.com',
-            status=StatusMotorista.ATIVO
-        )
-
+        """Motorista não pode ver entregas de outro motorista (404: o
+        queryset restrito nem expõe a existência do registro)"""
         self.authenticate_motorista()
-        response = self.client.get(reverse('motorista-entregas', args=[outro_motorista.id]))
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get(reverse('motorista-entregas', args=[self.outro_motorista.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
 class VeiculoTests(BaseTestCase):
@@ -322,28 +395,20 @@ class VeiculoTests(BaseTestCase):
     def test_list_veiculos_admin(self):
         """Admin pode listar todos os veículos"""
         self.authenticate_admin()
-        response = self.client.get(reverse('veiculo-list'))
+        response = self.client.get(VEICULO_LIST_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertGreaterEqual(len(response.data), 1)
 
     def test_list_veiculos_motorista(self):
         """Motorista pode listar veículos"""
         self.authenticate_motorista()
-        response = self.client.get(reverse('veiculo-list'))
+        response = self.client.get(VEICULO_LIST_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_create_veiculo_admin(self):
         """Admin pode criar veículo"""
         self.authenticate_admin()
-        data = {
-            'placa': 'XYZ9999',
-            'modelo': 'Uno',
-            'marca': 'Fiat',
-            'tipo': 'carro',
-            'capacidade_maxima': 80,
-            'ano_fabricacao': 2019
-        }
-        response = self.client.post(reverse('veiculo-list'), data)
+        response = self.client.post(VEICULO_LIST_URL, NOVO_VEICULO_PAYLOAD)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data['placa'], 'XYZ9999')
 
@@ -361,8 +426,9 @@ class VeiculoTests(BaseTestCase):
         response = self.client.put(reverse('motorista-atribuir-veiculo', args=[self.motorista.id]), data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        # Verificar se veículo foi atribuído
-        self.veiculo.refresh_from_db()
+        # Verificar se veículo foi atribuído (recarregando só as colunas
+        # verificadas)
+        self.veiculo.refresh_from_db(fields=['motorista_atual', 'status'])
         self.assertEqual(self.veiculo.motorista_atual, self.motorista)
         self.assertEqual(self.veiculo.status, StatusVeiculo.EM_USO)
 
@@ -370,10 +436,25 @@ class VeiculoTests(BaseTestCase):
 class EntregaTests(BaseTestCase):
     """Testes para Entrega"""
 
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Motorista "de terceiro" compartilhado pelos testes de permissão da
+        # classe: criado uma única vez em vez de um INSERT por teste
+        cls.outro_motorista = Motorista.objects.create(
+            nome='Outro Motorista',
+            cpf='22222222222',
+            cnh='B',
+            cnh_numero='222222222',
+            telefone='11333333333',
+            email='outro2@test.com',
+            status=StatusMotorista.ATIVO
+        )
+
     def test_list_entregas_admin(self):
         """Admin pode listar todas as entregas"""
         self.authenticate_admin()
-        response = self.client.get(reverse('entrega-list'))
+        response = self.client.get(ENTREGA_LIST_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertGreaterEqual(len(response.data), 1)
 
@@ -383,24 +464,15 @@ class EntregaTests(BaseTestCase):
         self.entrega.save()
 
         self.authenticate_motorista()
-        response = self.client.get(reverse('entrega-list'))
+        response = self.client.get(ENTREGA_LIST_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
 
     def test_create_entrega_admin(self):
         """Admin pode criar entrega"""
         self.authenticate_admin()
-        data = {
-            'cliente_id': self.cliente.id,
-            'endereco_origem': 'Rua Origem, 100',
-            'endereco_destino': 'Rua Destino, 200',
-            'cep_origem': '01234000',
-            'cep_destino': '01235000',
-            'capacidade_necessaria': 30,
-            'valor_frete': '200.00',
-            'data_entrega_prevista': (timezone.now().date() + timedelta(days=3)).isoformat()
-        }
-        response = self.client.post(reverse('entrega-list'), data)
+        data = {**NOVA_ENTREGA_PAYLOAD, 'cliente_id': self.cliente.id}
+        response = self.client.post(ENTREGA_LIST_URL, data)
         
         # Debug: imprimir erros se houver
         if response.status_code != status.HTTP_201_CREATED:
@@ -413,11 +485,14 @@ class EntregaTests(BaseTestCase):
         """Admin pode atribuir motorista a entrega"""
         self.authenticate_admin()
         data = {'motorista_id': self.motorista.id}
-        response = self.client.post(reverse('entrega-atribuir-motorista', args=[self.entrega.id]), data)
+        # Guarda de regressão: usuário autenticado + entrega + motorista +
+        # UPDATE + motorista do serializer de resposta
+        with self.assertNumQueries(5):
+            response = self.client.post(reverse('entrega-atribuir-motorista', args=[self.entrega.id]), data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         # Verificar atribuição
-        self.entrega.refresh_from_db()
+        self.entrega.refresh_from_db(fields=['motorista'])
         self.assertEqual(self.entrega.motorista, self.motorista)
 
     def test_atualizar_status_motorista(self):
@@ -430,25 +505,55 @@ class EntregaTests(BaseTestCase):
             'status': 'em_transito',
             'observacao': 'Saiu para entrega'
         }
-        response = self.client.put(reverse('entrega-atualizar-status', args=[self.entrega.id]), data)
+        # Guarda de regressão do caminho de escrita (UPDATE da entrega +
+        # INSERT do histórico; o resto é autenticação, get_object e
+        # serializers)
+        with self.assertNumQueries(6):
+            response = self.client.put(reverse('entrega-atualizar-status', args=[self.entrega.id]), data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         # Verificar atualização
-        self.entrega.refresh_from_db()
+        self.entrega.refresh_from_db(fields=['status'])
         self.assertEqual(self.entrega.status, StatusEntrega.EM_TRANSITO)
 
+    def test_atualizar_status_bulk_admin(self):
+        """Admin atualiza o status de várias entregas numa única chamada"""
+        outra_entrega = Entrega.objects.create(
+            cliente=self.cliente,
+            endereco_origem='Rua A, 1',
+            endereco_destino='Rua B, 2',
+            cep_origem='01234000',
+            cep_destino='01235000',
+            capacidade_necessaria=20,
+            valor_frete=Decimal('100.00'),
+            data_entrega_prevista=TODAY + timedelta(days=1),
+        )
+
+        self.authenticate_admin()
+        # id numérico e id string no mesmo lote: a action coage ambos
+        data = {'atualizacoes': [
+            {'entrega_id': self.entrega.id, 'status': 'em_transito'},
+            {'entrega_id': str(outra_entrega.id), 'status': 'em_transito', 'observacao': 'Lote'},
+        ]}
+        response = self.client.put(
+            reverse('entrega-atualizar-status-bulk'), data, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.entrega.refresh_from_db(fields=['status'])
+        outra_entrega.refresh_from_db(fields=['status'])
+        self.assertEqual(self.entrega.status, StatusEntrega.EM_TRANSITO)
+        self.assertEqual(outra_entrega.status, StatusEntrega.EM_TRANSITO)
+        self.assertEqual(
+            HistoricoEntrega.objects.filter(
+                entrega__in=[self.entrega, outra_entrega]
+            ).count(),
+            2
+        )
+
     def test_atualizar_status_other_motorista_forbidden(self):
         """Motorista não pode atualizar status de entrega de outro motorista"""
-        # Criar outro motorista e entrega
-        outro_motorista = Motorista.objects.create(
-            nome='Outro Motorista',
-            cpf='22222222222',
-            cnh='B',
-            cnh_numero='222222222',
-            telefone='11333333333',
-            email='outro2@test.com',
-            status=StatusMotorista.ATIVO
-        )
+        # Criar entrega do outro motorista
         outra_entrega = Entrega.objects.create(
             cliente=self.cliente,
             endereco_origem='Rua A, 1',
@@ -457,8 +562,8 @@ class EntregaTests(BaseTestCase):
             cep_destino='01235000',
             capacidade_necessaria=20,
             valor_frete=Decimal('100.00'),
-            data_entrega_prevista=timezone.now().date() + timedelta(days=1),
-            motorista=outro_motorista
+            data_entrega_prevista=TODAY + timedelta(days=1),
+            motorista=self.outro_motorista
         )
 
         self.authenticate_motorista()
@@ -469,7 +574,7 @@ class EntregaTests(BaseTestCase):
     def test_rastreamento_publico(self):
         """Rastreamento público funciona sem autenticação"""
         self.clear_authentication()
-        url = reverse('entrega-por-codigo-rastreio')
+        url = RASTREIO_URL
         response = self.client.get(url, {'codigo': self.entrega.codigo_rastreio})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['codigo_rastreio'], self.entrega.codigo_rastreio)
@@ -477,10 +582,35 @@ class EntregaTests(BaseTestCase):
     def test_rastreamento_codigo_invalido(self):
         """Rastreamento com código inválido retorna 404"""
         self.clear_authentication()
-        url = reverse('entrega-por-codigo-rastreio')
+        url = RASTREIO_URL
         response = self.client.get(url, {'codigo': 'INVALIDO'})
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_rastreamento_publico_cache_e_invalidacao(self):
+        """Rastreamento público é cacheado e invalidado ao mudar o status"""
+        codigo = self.entrega.codigo_rastreio
+
+        # Primeira chamada popula o cache; a repetição é servida dele,
+        # sem nenhuma consulta ao banco
+        self.clear_authentication()
+        self.client.get(RASTREIO_URL, {'codigo': codigo})
+        with self.assertNumQueries(0):
+            response = self.client.get(RASTREIO_URL, {'codigo': codigo})
+        self.assertEqual(response.data['status'], StatusEntrega.PENDENTE)
+
+        # A escrita via atualizar_status usa update() (sem post_save) e
+        # invalida as chaves explicitamente; a leitura seguinte já reflete
+        self.authenticate_admin()
+        response = self.client.put(
+            reverse('entrega-atualizar-status', args=[self.entrega.id]),
+            {'status': 'em_transito'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.clear_authentication()
+        response = self.client.get(RASTREIO_URL, {'codigo': codigo})
+        self.assertEqual(response.data['status'], StatusEntrega.EM_TRANSITO)
+
 
 class RotaTests(BaseTestCase):
     """Testes para Rota"""
@@ -488,14 +618,14 @@ class RotaTests(BaseTestCase):
     def test_list_rotas_admin(self):
         """Admin pode listar todas as rotas"""
         self.authenticate_admin()
-        response = self.client.get(reverse('rota-list'))
+        response = self.client.get(ROTA_LIST_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertGreaterEqual(len(response.data), 1)
 
     def test_list_rotas_motorista(self):
         """Motorista pode listar apenas suas rotas"""
         self.authenticate_motorista()
-        response = self.client.get(reverse('rota-list'))
+        response = self.client.get(ROTA_LIST_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
 
@@ -503,23 +633,27 @@ class RotaTests(BaseTestCase):
         """Admin pode criar rota"""
         self.authenticate_admin()
         data = {
-            'nome': 'Nova Rota',
+            **NOVA_ROTA_PAYLOAD,
             'motorista_id': self.motorista.id,
             'veiculo_id': self.veiculo.id,
-            'data_rota': timezone.now().date().isoformat(),
             'entregas_ids': [self.entrega.id]
         }
-        response = self.client.post(reverse('rota-list'), data)
+        response = self.client.post(ROTA_LIST_URL, data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
     def test_iniciar_rota_motorista(self):
         """Motorista pode iniciar sua rota"""
         self.authenticate_motorista()
-        response = self.client.put(reverse('rota-iniciar-rota', args=[self.rota.id]))
+        # Guarda de regressão: o número é alto porque Rota.save() recalcula
+        # capacidade e propaga status para motorista e veículo (inclui o
+        # par SAVEPOINT/RELEASE da transação e o SELECT dos códigos para
+        # invalidar o cache de rastreio)
+        with self.assertNumQueries(12):
+            response = self.client.put(reverse('rota-iniciar-rota', args=[self.rota.id]))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         # Verificar se rota foi iniciada
-        self.rota.refresh_from_db()
+        self.rota.refresh_from_db(fields=['status', 'data_inicio'])
         self.assertEqual(self.rota.status, StatusRota.EM_ANDAMENTO)
         self.assertIsNotNone(self.rota.data_inicio)
 
@@ -539,7 +673,7 @@ class RotaTests(BaseTestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         # Verificar se rota foi concluída
-        self.rota.refresh_from_db()
+        self.rota.refresh_from_db(fields=['status', 'km_total_real'])
         self.assertEqual(self.rota.status, StatusRota.CONCLUIDA)
         self.assertEqual(self.rota.km_total_real, 150)
 
@@ -553,6 +687,34 @@ class RotaTests(BaseTestCase):
         # Verificar se entrega foi adicionada
         self.assertIn(self.entrega, self.rota.entregas.all())
 
+    def test_adicionar_entregas_bulk_admin(self):
+        """Admin pode adicionar várias entregas à rota de uma vez"""
+        self.authenticate_admin()
+        outra_entrega = Entrega.objects.create(
+            cliente=self.cliente,
+            endereco_origem='Rua Origem, 300',
+            endereco_destino='Rua Destino, 400',
+            cep_origem='01234000',
+            cep_destino='01235000',
+            capacidade_necessaria=20,
+            valor_frete=Decimal('80.00'),
+            data_entrega_prevista=TODAY + timedelta(days=2)
+        )
+
+        data = {'entrega_ids': [self.entrega.id, outra_entrega.id]}
+        response = self.client.post(
+            reverse('rota-adicionar-entregas-bulk', args=[self.rota.id]), data, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # Verificar se as entregas foram adicionadas e a capacidade somada
+        self.assertEqual(self.rota.entregas.count(), 2)
+        self.rota.refresh_from_db(fields=['capacidade_total_utilizada'])
+        self.assertEqual(
+            self.rota.capacidade_total_utilizada,
+            self.entrega.capacidade_necessaria + outra_entrega.capacidade_necessaria
+        )
+
     def test_capacidade_rota_motorista(self):
         """Motorista pode ver capacidade de sua rota"""
         self.authenticate_motorista()
@@ -575,14 +737,28 @@ class DashboardTests(BaseTestCase):
     def test_relatorios_admin(self):
         """Admin pode acessar relatórios"""
         self.authenticate_admin()
-        response = self.client.get(reverse('relatorios'))
+        response = self.client.get(RELATORIOS_URL)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('estatisticas', response.data)
 
+    def test_precalcular_estatisticas_comando(self):
+        """Comando gera uma linha de resumo por dia fechado"""
+        ontem = timezone.now() - timedelta(days=1)
+        # data_solicitacao é auto_now_add; empurra a entrega da fixture para
+        # ontem via UPDATE direto
+        Entrega.objects.filter(pk=self.entrega.pk).update(data_solicitacao=ontem)
+
+        call_command('precalcular_estatisticas', dias=2, verbosity=0)
+
+        self.assertEqual(EstatisticaDiaria.objects.count(), 2)
+        resumo = EstatisticaDiaria.objects.get(data=ontem.date())
+        self.assertEqual(resumo.entregas_total, 1)
+        self.assertEqual(resumo.entregas_pendentes, 1)
+
     def test_relatorios_motorista_forbidden(self):
         """Motorista não pode acessar relatórios"""
         self.authenticate_motorista()
-        response = self.client.get(reverse('relatorios'))
+        response = self.client.get(RELATORIOS_URL)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
 
@@ -592,42 +768,70 @@ class PermissionTests(BaseTestCase):
     def test_unauthenticated_access_forbidden(self):
         """Acesso não autenticado é proibido para endpoints protegidos"""
         # Tentar acessar lista de clientes sem autenticação
-        response = self.client.get(reverse('cliente-list'))
+        response = self.client.get(CLIENTE_LIST_URL)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
+    # Nomes das rotas verificadas; as URLs são resolvidas uma única vez por
+    # classe (reverse percorre a árvore de resolução a cada chamada)
+    ENDPOINT_NAMES = (
+        'motorista-list',
+        'veiculo-list',
+        'entrega-list',
+        'rota-list',
+        'relatorios',
+    )
+    _endpoints = None
+
+    @classmethod
+    def get_endpoints(cls):
+        if cls._endpoints is None:
+            cls._endpoints = [reverse(name) for name in cls.ENDPOINT_NAMES]
+        return cls._endpoints
+
     def test_admin_only_endpoints(self):
         """Testar endpoints restritos apenas para admin"""
-        endpoints = [
-            reverse('motorista-list'),
-            reverse('veiculo-list'),
-            reverse('entrega-list'),
-            reverse('rota-list'),
-            reverse('relatorios'),
-        ]
-
-        for endpoint in endpoints:
+        # Tokens compartilhados da classe, em vez de dois logins com hash de
+        # senha por endpoint
+        admin_auth = f'Bearer {self.admin_token}'
+        motorista_auth = f'Bearer {self.motorista_token}'
+
+        for endpoint in self.get_endpoints():
             # Sem autenticação
+            self.client.credentials()
             response = self.client.get(endpoint)
             self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
             # Como motorista (deve funcionar para alguns, mas vamos testar)
-            self.authenticate_motorista()
+            self.client.credentials(HTTP_AUTHORIZATION=motorista_auth)
             response = self.client.get(endpoint)
             # Pode ser 200 ou 403 dependendo do endpoint
             self.assertIn(response.status_code, [status.HTTP_200_OK, status.HTTP_403_FORBIDDEN])
 
-            self.clear_authentication()
-
             # Como admin
-            self.authenticate_admin()
+            self.client.credentials(HTTP_AUTHORIZATION=admin_auth)
             response = self.client.get(endpoint)
             self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-            self.clear_authentication()
+        self.client.credentials()
 
 
 class ModelValidationTests(TestCase):
-    """Testes de validação dos modelos"""
+    """Testes de validação dos modelos.
+
+    Testes puros de modelo: ficam no TestCase simples (sem APIClient) para
+    rodar no caminho rápido de rollback por savepoint.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.cliente = Cliente.objects.create(
+            nome='Cliente',
+            email='cliente@test.com',
+            telefone='11999999999',
+            cpf_cnpj='12345678901234',
+            endereco='Rua Teste',
+            cep='01234567'
+        )
 
     def test_cpf_unico_motorista(self):
         """CPF deve ser único para motoristas"""
@@ -673,60 +877,42 @@ class ModelValidationTests(TestCase):
 
     def test_codigo_rastreio_unico_entrega(self):
         """Código de rastreio deve ser único"""
-        cliente = Cliente.objects.create(
-            nome='Cliente',
-            email='cliente@test.com',
-            telefone='11999999999',
-            cpf_cnpj='12345678901234',
-            endereco='Rua Teste',
-            cep='01234567'
-        )
-
         entrega1 = Entrega.objects.create(
-            cliente=cliente,
+            cliente=self.cliente,
             endereco_origem='Origem',
             endereco_destino='Destino',
             cep_origem='01234000',
             cep_destino='01235000',
             capacidade_necessaria=50,
             valor_frete=Decimal('100.00'),
-            data_entrega_prevista=timezone.now().date()
+            data_entrega_prevista=TODAY
         )
 
         # Criar segunda entrega e verificar se códigos são diferentes
         entrega2 = Entrega.objects.create(
-            cliente=cliente,
+            cliente=self.cliente,
             endereco_origem='Origem 2',
             endereco_destino='Destino 2',
             cep_origem='01234000',
             cep_destino='01235000',
             capacidade_necessaria=30,
             valor_frete=Decimal('80.00'),
-            data_entrega_prevista=timezone.now().date()
+            data_entrega_prevista=TODAY
         )
 
         self.assertNotEqual(entrega1.codigo_rastreio, entrega2.codigo_rastreio)
 
     def test_status_transitions_entrega(self):
         """Testar transições válidas de status de entrega"""
-        cliente = Cliente.objects.create(
-            nome='Cliente',
-            email='cliente@test.com',
-            telefone='11999999999',
-            cpf_cnpj='12345678901234',
-            endereco='Rua Teste',
-            cep='01234567'
-        )
-
         entrega = Entrega.objects.create(
-            cliente=cliente,
+            cliente=self.cliente,
             endereco_origem='Origem',
             endereco_destino='Destino',
             cep_origem='01234000',
             cep_destino='01235000',
             capacidade_necessaria=50,
             valor_frete=Decimal('100.00'),
-            data_entrega_prevista=timezone.now().date()
+            data_entrega_prevista=TODAY
         )
 
         # Status inicial deve ser PENDENTE
@@ -745,30 +931,32 @@ class ModelValidationTests(TestCase):
 
 
 class SerializerValidationTests(BaseTestCase):
-    """Testes de validação dos serializers"""
+    """Testes de validação dos serializers.
+
+    Estes testes exercitam só a validação, então chamam o viewset direto
+    via APIRequestFactory + force_authenticate, pulando middleware,
+    resolução de URL e autenticação JWT do caminho completo.
+    """
+
+    factory = APIRequestFactory()
 
     def test_entrega_serializer_validation(self):
         """Testar validações do serializer de entrega"""
-        self.authenticate_admin()
-
         # Data inválida (passada)
         data = {
+            **NOVA_ENTREGA_PAYLOAD,
             'cliente_id': self.cliente.id,
-            'endereco_origem': 'Rua Origem, 100',
-            'endereco_destino': 'Rua Destino, 200',
-            'cep_origem': '01234000',
-            'cep_destino': '01235000',
             'capacidade_necessaria': 50,
             'valor_frete': '150.00',
-            'data_entrega_prevista': (timezone.now().date() - timedelta(days=1)).isoformat()  # Data passada
+            'data_entrega_prevista': (TODAY - timedelta(days=1)).isoformat()  # Data passada
         }
-        response = self.client.post(reverse('entrega-list'), data)
+        request = self.factory.post('/api/entregas/', data)
+        force_authenticate(request, user=self.admin_user)
+        response = EntregaViewSet.as_view({'post': 'create'})(request)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_rota_serializer_capacity_validation(self):
         """Testar validação de capacidade na rota"""
-        self.authenticate_admin()
-
         # Criar veículo com capacidade limitada
         veiculo_pequeno = Veiculo.objects.create(
             placa='XYZ0001',
@@ -789,17 +977,19 @@ class SerializerValidationTests(BaseTestCase):
             cep_destino='01235000',
             capacidade_necessaria=60,  # Maior que capacidade do veículo
             valor_frete=Decimal('200.00'),
-            data_entrega_prevista=timezone.now().date() + timedelta(days=1)
+            data_entrega_prevista=TODAY + timedelta(days=1)
         )
 
         data = {
+            **NOVA_ROTA_PAYLOAD,
             'nome': 'Rota com sobrecarga',
             'motorista_id': self.motorista.id,
             'veiculo_id': veiculo_pequeno.id,
-            'data_rota': timezone.now().date().isoformat(),
             'entregas_ids': [entrega_grande.id]
         }
-        response = self.client.post(reverse('rota-list'), data)
+        request = self.factory.post('/api/rotas/', data)
+        force_authenticate(request, user=self.admin_user)
+        response = RotaViewSet.as_view({'post': 'create'})(request)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
@@ -811,16 +1001,12 @@ class IntegrationTests(BaseTestCase):
         # 1. Admin cria entrega
         self.authenticate_admin()
         entrega_data = {
+            **NOVA_ENTREGA_PAYLOAD,
             'cliente_id': self.cliente.id,
-            'endereco_origem': 'Rua Origem, 100',
-            'endereco_destino': 'Rua Destino, 200',
-            'cep_origem': '01234000',
-            'cep_destino': '01235000',
-            'capacidade_necessaria': 30,
             'valor_frete': '120.00',
-            'data_entrega_prevista': (timezone.now().date() + timedelta(days=2)).isoformat()
+            'data_entrega_prevista': (TODAY + timedelta(days=2)).isoformat()
         }
-        response = self.client.post(reverse('entrega-list'), entrega_data)
+        response = self.client.post(ENTREGA_LIST_URL, entrega_data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         entrega_id = response.data['id']
 
@@ -838,15 +1024,19 @@ class IntegrationTests(BaseTestCase):
         response = self.client.put(reverse('entrega-atualizar-status', args=[entrega_id]), status_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        # 4. Verificar histórico foi criado
-        entrega = Entrega.objects.get(id=entrega_id)
-        historico_count = HistoricoEntrega.objects.filter(entrega=entrega).count()
-        self.assertGreater(historico_count, 0)
+        # 4. Verificar histórico foi criado. O prefetch traz o histórico
+        # junto; o assertNumQueries(0) prova que a verificação usa o cache
+        # em memória em vez de um COUNT extra
+        entrega = Entrega.objects.only('id', 'codigo_rastreio').prefetch_related('historico').get(pk=entrega_id)
+        with self.assertNumQueries(0):
+            self.assertGreater(len(entrega.historico.all()), 0)
 
-        # 5. Rastreamento público funciona
+        # 5. Rastreamento público funciona (entrega + histórico em duas
+        # consultas; select_related cobre cliente/motorista/rota)
         self.clear_authentication()
-        url = reverse('entrega-por-codigo-rastreio')
-        response = self.client.get(url, {'codigo': entrega.codigo_rastreio})
+        url = RASTREIO_URL
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'codigo': entrega.codigo_rastreio})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('historico', response.data)
 
@@ -855,13 +1045,13 @@ class IntegrationTests(BaseTestCase):
         # 1. Admin cria rota
         self.authenticate_admin()
         rota_data = {
+            **NOVA_ROTA_PAYLOAD,
             'nome': 'Rota de Teste Completo',
             'motorista_id': self.motorista.id,
             'veiculo_id': self.veiculo.id,
-            'data_rota': timezone.now().date().isoformat(),
             'entregas_ids': [self.entrega.id]
         }
-        response = self.client.post(reverse('rota-list'), rota_data)
+        response = self.client.post(ROTA_LIST_URL, rota_data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         rota_id = response.data['id']
 
@@ -878,8 +1068,8 @@ class IntegrationTests(BaseTestCase):
         response = self.client.put(reverse('rota-concluir-rota', args=[rota_id]), conclusion_data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        # 4. Verificar status finais
-        rota = Rota.objects.get(id=rota_id)
+        # 4. Verificar status finais (só as colunas verificadas)
+        rota = Rota.objects.only('status', 'km_total_real', 'tempo_real_minutos').get(pk=rota_id)
         self.assertEqual(rota.status, StatusRota.CONCLUIDA)
         self.assertEqual(rota.km_total_real, 120)
         self.assertEqual(rota.tempo_real_minutos, 90)
\ No newline at end of file
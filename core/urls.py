@@ -14,7 +14,6 @@ urlpatterns = [
     path('relatorios/', views.RelatoriosView.as_view(), name='relatorios'),
     path('dashboard/motorista/', views.DashboardMotoristaView.as_view(), name='dashboard-motorista'),
     path('rastreio/', views.RastreamentoPublicoView.as_view(), name='rastreio-publico'),
-    
-    # Endpoint para motorista ver seus dados
-    path('motoristas/me/', views.MotoristaViewSet.as_view({'get': 'me'}), name='motorista-me'),
+    # motoristas/me/ vem do router: a @action "me" do MotoristaViewSet já
+    # gera a rota motorista-me
 ]
\ No newline at end of file
@@ -3,16 +3,23 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Sum, Count, Case, When, Value, IntegerField
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import (
+    Q, Sum, Count, Case, When, Value, IntegerField, DecimalField, F,
+    Subquery, OuterRef, Exists, Prefetch
+)
 from django.db.models.functions import Coalesce
 from django.utils import timezone
+from collections import Counter
 from datetime import timedelta
 from decimal import Decimal
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 from core.models import (
-    Cliente, Motorista, Veiculo, Entrega, Rota, HistoricoEntrega
+    Cliente, Motorista, Veiculo, Entrega, Rota, HistoricoEntrega,
+    StatusEntrega, EstatisticaDiaria
 )
 from core.serializers import (
     ClienteSerializer, MotoristaSerializer, VeiculoSerializer,
@@ -26,9 +33,32 @@ from core.permissions import (
     IsProprioMotorista, IsAdministradorOuMotoristaDaEntrega,
     IsAdministradorOuMotoristaDaRota, FiltroMotorista
 )
+from core.tasks import registrar_historico_entrega
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
+# Sentinela para distinguir "ainda não consultado" de "usuário sem motorista"
+_MOTORISTA_NAO_CONSULTADO = object()
+
+
+def _get_request_motorista(request):
+    """
+    Retorna o Motorista do usuário autenticado, memoizado na requisição.
+
+    A mesma requisição consulta o motorista em get_queryset, permissões e
+    actions; o cache limita isso a uma consulta. Retorna None quando o
+    usuário não tem motorista associado.
+    """
+    cached = getattr(request, '_motorista_cache', _MOTORISTA_NAO_CONSULTADO)
+    if cached is _MOTORISTA_NAO_CONSULTADO:
+        try:
+            cached = Motorista.objects.select_related('usuario').get(usuario=request.user)
+        except Motorista.DoesNotExist:
+            cached = None
+        request._motorista_cache = cached
+    return cached
+
+
 class ClienteViewSet(viewsets.ModelViewSet):
     queryset = Cliente.objects.all()
     serializer_class = ClienteSerializer
@@ -60,15 +90,18 @@ class ClienteViewSet(viewsets.ModelViewSet):
         
         # Se não for admin, filtra clientes das suas entregas
         if not self.request.user.is_staff:
-            try:
-                motorista = Motorista.objects.get(usuario=self.request.user)
-                # Clientes das entregas do motorista
-                entregas_motorista = Entrega.objects.filter(motorista=motorista)
-                cliente_ids = entregas_motorista.values_list('cliente_id', flat=True).distinct()
-                queryset = queryset.filter(id__in=cliente_ids)
-            except Motorista.DoesNotExist:
+            motorista = _get_request_motorista(self.request)
+            if motorista is not None:
+                # Semi-join com EXISTS: não multiplica linhas (dispensa o
+                # DISTINCT) e costuma gerar plano melhor que IN (subquery)
+                queryset = queryset.filter(Exists(
+                    Entrega.objects.filter(
+                        cliente_id=OuterRef('pk'), motorista=motorista
+                    )
+                ))
+            else:
                 queryset = queryset.none()
-        
+
         return queryset
 
 class MotoristaViewSet(viewsets.ModelViewSet):
@@ -97,92 +130,69 @@ class MotoristaViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """
-        Admin vê todos, motorista vê apenas ele mesmo (exceto para actions específicas)
+        Admin vê todos, motorista vê apenas ele mesmo. Com o queryset já
+        restrito, get_object() devolve 404 para objetos de terceiros e as
+        actions dispensam verificação manual de dono
         """
         # Evitar erro durante geração de schema do Swagger
         if getattr(self, 'swagger_fake_view', False):
             return Motorista.objects.none()
-            
+
         queryset = super().get_queryset()
-        
-        if not self.request.user.is_staff and self.action not in ['entregas']:
-            try:
-                motorista = Motorista.objects.get(usuario=self.request.user)
+
+        if not self.request.user.is_staff:
+            motorista = _get_request_motorista(self.request)
+            if motorista is not None:
                 queryset = queryset.filter(id=motorista.id)
-            except Motorista.DoesNotExist:
+            else:
                 queryset = queryset.none()
-        
+
         return queryset
     
     @action(detail=True, methods=['get'])
     def entregas(self, request, pk=None):
-        """Motorista vê apenas suas entregas"""
+        """Motorista vê apenas suas entregas (o queryset já restringe a ele)"""
         motorista = self.get_object()
-        
-        # Verificar se motorista pode ver (próprio ou admin)
-        if not request.user.is_staff:
-            try:
-                user_motorista = Motorista.objects.get(usuario=request.user)
-                if motorista != user_motorista:
-                    return Response(
-                        {'error': 'Você só pode ver suas próprias entregas'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
-            except Motorista.DoesNotExist:
-                return Response(
-                    {'error': 'Motorista não encontrado'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        
-        entregas = motorista.entregas.all()
+
+        # Paginação padrão do projeto: mantém memória e payload O(página)
+        # mesmo para motoristas com milhares de entregas
+        entregas = motorista.entregas.select_related(
+            'cliente', 'motorista__usuario', 'rota'
+        )
+        page = self.paginate_queryset(entregas)
+        if page is not None:
+            serializer = EntregaSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = EntregaSerializer(entregas, many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
     def rotas(self, request, pk=None):
-        """Motorista vê apenas suas rotas"""
+        """Motorista vê apenas suas rotas (o queryset já restringe a ele)"""
         motorista = self.get_object()
-        
-        # Verificar se motorista pode ver (próprio ou admin)
-        if not request.user.is_staff:
-            try:
-                user_motorista = Motorista.objects.get(usuario=request.user)
-                if motorista != user_motorista:
-                    return Response(
-                        {'error': 'Você só pode ver suas próprias rotas'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
-            except Motorista.DoesNotExist:
-                return Response(
-                    {'error': 'Motorista não encontrado'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        
-        rotas = motorista.rotas.all()
+
+        rotas = motorista.rotas.select_related(
+            'motorista__usuario', 'veiculo__motorista_atual__usuario'
+        ).prefetch_related('entregas__cliente', 'entregas__motorista__usuario')
+        page = self.paginate_queryset(rotas)
+        if page is not None:
+            serializer = RotaSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = RotaSerializer(rotas, many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
     def historico(self, request, pk=None):
-        """Motorista vê apenas seu histórico"""
+        """Motorista vê apenas seu histórico (o queryset já restringe a ele)"""
         motorista = self.get_object()
-        
-        # Verificar se motorista pode ver (próprio ou admin)
-        if not request.user.is_staff:
-            try:
-                user_motorista = Motorista.objects.get(usuario=request.user)
-                if motorista != user_motorista:
-                    return Response(
-                        {'error': 'Você só pode ver seu próprio histórico'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
-            except Motorista.DoesNotExist:
-                return Response(
-                    {'error': 'Motorista não encontrado'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        
-        historico = HistoricoEntrega.objects.filter(motorista=motorista)
+
+        historico = HistoricoEntrega.objects.filter(
+            motorista=motorista
+        ).select_related('motorista__usuario')
+        page = self.paginate_queryset(historico)
+        if page is not None:
+            serializer = HistoricoEntregaSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = HistoricoEntregaSerializer(historico, many=True)
         return Response(serializer.data)
     
@@ -199,27 +209,30 @@ class MotoristaViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            veiculo = Veiculo.objects.get(id=veiculo_id, status='disponivel')
+            # Só id e placa são usados; a troca em si é feita via UPDATE
+            veiculo = Veiculo.objects.only('id', 'placa').get(
+                id=veiculo_id, status='disponivel'
+            )
         except Veiculo.DoesNotExist:
             return Response(
                 {'error': 'Veículo não encontrado ou não está disponível'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Liberar veículo atual do motorista, se houver
-        if motorista.veiculos_associados.filter(status='em_uso').exists():
-            veiculo_anterior = motorista.veiculos_associados.get(status='em_uso')
-            veiculo_anterior.motorista_atual = None
-            veiculo_anterior.status = 'disponivel'
-            veiculo_anterior.save()
-        
-        # Atribuir novo veículo
-        veiculo.motorista_atual = motorista
-        veiculo.status = 'em_uso'
-        veiculo.save()
-        
-        motorista.status = 'disponivel'
-        motorista.save()
+        # Troca de veículo em uma transação, com UPDATEs diretos: o
+        # exists()+get()+3 saves viram 3 instruções e o estado não fica
+        # inconsistente se algo falhar no meio
+        with transaction.atomic():
+            # Liberar veículo atual do motorista, se houver
+            motorista.veiculos_associados.filter(status='em_uso').update(
+                motorista_atual=None, status='disponivel'
+            )
+
+            # Atribuir novo veículo
+            Veiculo.objects.filter(pk=veiculo.pk).update(
+                motorista_atual=motorista, status='em_uso'
+            )
+            Motorista.objects.filter(pk=motorista.pk).update(status='disponivel')
         
         return Response({
             'message': f'Veículo {veiculo.placa} atribuído ao motorista {motorista.nome}'
@@ -227,66 +240,63 @@ class MotoristaViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def visao_completa(self, request, pk=None):
-        """Motorista vê apenas sua visão completa"""
+        """Motorista vê apenas sua visão completa (o queryset já restringe a ele)"""
         motorista = self.get_object()
-        
-        # Verificar se motorista pode ver (próprio ou admin)
-        if not request.user.is_staff:
-            try:
-                user_motorista = Motorista.objects.get(usuario=request.user)
-                if motorista != user_motorista:
-                    return Response(
-                        {'error': 'Você só pode ver seus próprios dados'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
-            except Motorista.DoesNotExist:
-                return Response(
-                    {'error': 'Motorista não encontrado'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        
+
+        # Substituto de uma view materializada: cada motorista reabre o app
+        # com os mesmos agregados, então a resposta fica 30s no cache e é
+        # invalidada quando uma entrega/rota do motorista muda
+        cache_key = f'motorista_dashboard:{motorista.pk}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return Response(cached)
+
         # Buscar dados
         veiculo_atual = motorista.veiculos_associados.filter(status='em_uso').first()
         rotas_ativas = motorista.rotas.filter(status='em_andamento')
-        
-        # Estatísticas
-        total_entregas = motorista.entregas.count()
-        entregas_pendentes = motorista.entregas.filter(status='pendente').count()
-        entregas_concluidas = motorista.entregas.filter(status='entregue').count()
-        
+
+        # Estatísticas: as três contagens saem numa única consulta com
+        # agregados condicionais, em vez de três COUNTs separados
+        stats = motorista.entregas.aggregate(
+            total=Count('id'),
+            pendentes=Count('id', filter=Q(status='pendente')),
+            concluidas=Count('id', filter=Q(status='entregue')),
+        )
+
         # Calcular capacidade utilizada nas rotas ativas
         capacidade_utilizada = rotas_ativas.aggregate(
             total=Coalesce(Sum('capacidade_total_utilizada'), 0)
         )['total']
-        
+
         data = {
             'motorista': motorista,
             'veiculo_atual': veiculo_atual,
             'rotas_ativas': rotas_ativas,
-            'total_entregas': total_entregas,
-            'entregas_pendentes': entregas_pendentes,
-            'entregas_concluidas': entregas_concluidas,
+            'total_entregas': stats['total'],
+            'entregas_pendentes': stats['pendentes'],
+            'entregas_concluidas': stats['concluidas'],
             'capacidade_utilizada': capacidade_utilizada,
         }
         
         serializer = DashboardMotoristaSerializer(data)
+        cache.set(cache_key, serializer.data, timeout=30)
         return Response(serializer.data)
-    
+
     @action(detail=False, methods=['get'])
     def me(self, request):
         """Motorista vê seus próprios dados (endpoint util)"""
-        try:
-            motorista = Motorista.objects.get(usuario=request.user)
-            serializer = self.get_serializer(motorista)
-            return Response(serializer.data)
-        except Motorista.DoesNotExist:
+        motorista = _get_request_motorista(request)
+        if motorista is None:
             return Response(
                 {'error': 'Motorista não encontrado para este usuário'},
                 status=status.HTTP_404_NOT_FOUND
             )
+        serializer = self.get_serializer(motorista)
+        return Response(serializer.data)
 
 class VeiculoViewSet(viewsets.ModelViewSet):
-    queryset = Veiculo.objects.all()
+    # motorista_atual_info do serializer vem no mesmo SELECT
+    queryset = Veiculo.objects.select_related('motorista_atual__usuario')
     serializer_class = VeiculoSerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['status', 'tipo']
@@ -302,7 +312,42 @@ class VeiculoViewSet(viewsets.ModelViewSet):
         else:
             permission_classes = [IsAuthenticated]
         return [permission() for permission in permission_classes]
-    
+
+    def get_queryset(self):
+        """
+        Veículos são visíveis a todos os autenticados; em status_detalhado o
+        motorista só enxerga o próprio veículo, então o queryset restrito faz
+        get_object() devolver 404 para os demais sem consulta extra
+        """
+        # Evitar erro durante geração de schema do Swagger
+        if getattr(self, 'swagger_fake_view', False):
+            return Veiculo.objects.none()
+
+        queryset = super().get_queryset()
+
+        if self.action == 'status_detalhado':
+            # A rota ativa e a capacidade disponível saem anotadas no mesmo
+            # SELECT do veículo, em vez de busca + subtração em Python
+            rota_ativa = Rota.objects.filter(
+                veiculo=OuterRef('pk'), status='em_andamento'
+            )
+            queryset = queryset.annotate(
+                rota_ativa_id=Subquery(rota_ativa.values('id')[:1]),
+                cap_usada_rota_ativa=Coalesce(
+                    Subquery(rota_ativa.values('capacidade_total_utilizada')[:1]),
+                    Value(0),
+                ),
+                capacidade_disponivel=F('capacidade_maxima') - F('cap_usada_rota_ativa'),
+            )
+            if not self.request.user.is_staff:
+                motorista = _get_request_motorista(self.request)
+                if motorista is not None:
+                    queryset = queryset.filter(motorista_atual=motorista)
+                else:
+                    queryset = queryset.none()
+
+        return queryset
+
     @action(detail=False, methods=['get'])
     def disponiveis(self, request):
         """Apenas admin pode ver veículos disponíveis"""
@@ -319,14 +364,21 @@ class VeiculoViewSet(viewsets.ModelViewSet):
         
         # Se não for admin, filtra rotas do motorista
         if not request.user.is_staff:
-            try:
-                motorista = Motorista.objects.get(usuario=request.user)
+            motorista = _get_request_motorista(request)
+            if motorista is not None:
                 rotas = veiculo.rotas.filter(motorista=motorista)
-            except Motorista.DoesNotExist:
+            else:
                 rotas = veiculo.rotas.none()
         else:
             rotas = veiculo.rotas.all()
-        
+
+        rotas = rotas.select_related(
+            'motorista__usuario', 'veiculo__motorista_atual__usuario'
+        ).prefetch_related('entregas__cliente', 'entregas__motorista__usuario')
+        page = self.paginate_queryset(rotas)
+        if page is not None:
+            serializer = RotaSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = RotaSerializer(rotas, many=True)
         return Response(serializer.data)
     
@@ -338,58 +390,60 @@ class VeiculoViewSet(viewsets.ModelViewSet):
         
         # Filtrar por motorista se não for admin
         if not request.user.is_staff:
-            try:
-                motorista = Motorista.objects.get(usuario=request.user)
+            motorista = _get_request_motorista(request)
+            if motorista is not None:
                 rotas = rotas.filter(motorista=motorista)
-            except Motorista.DoesNotExist:
+            else:
                 rotas = rotas.none()
         
-        # Calcular estatísticas
-        total_rotas = rotas.count()
-        total_km = rotas.aggregate(total=Sum('km_total_real'))['total'] or 0
-        rotas_concluidas = rotas.filter(status='concluida').count()
-        
+        # Estatísticas numa única consulta: os dois COUNTs e o SUM saem com
+        # agregados condicionais em vez de três varreduras separadas
+        stats = rotas.aggregate(
+            total=Count('id'),
+            concluidas=Count('id', filter=Q(status='concluida')),
+            total_km=Coalesce(Sum('km_total_real'), Value(0, output_field=DecimalField())),
+        )
+        total_rotas = stats['total']
+        total_km = stats['total_km']
+
+        ultimas_rotas = rotas.select_related(
+            'motorista__usuario', 'veiculo__motorista_atual__usuario'
+        ).prefetch_related('entregas__cliente', 'entregas__motorista__usuario')[:10]
+
         return Response({
             'veiculo': VeiculoSerializer(veiculo).data,
             'estatisticas': {
                 'total_rotas': total_rotas,
-                'rotas_concluidas': rotas_concluidas,
+                'rotas_concluidas': stats['concluidas'],
                 'total_km_percorridos': float(total_km),
                 'media_km_por_rota': float(total_km / total_rotas) if total_rotas > 0 else 0,
             },
-            'ultimas_rotas': RotaSerializer(rotas[:10], many=True).data,
+            'ultimas_rotas': RotaSerializer(ultimas_rotas, many=True).data,
         })
     
     @action(detail=True, methods=['get'])
     def status_detalhado(self, request, pk=None):
-        """Admin vê tudo, motorista vê apenas se for seu veículo"""
+        """Admin vê tudo, motorista vê apenas se for seu veículo (o queryset
+        já restringe ao veículo em uso pelo motorista)"""
         veiculo = self.get_object()
         motorista_atual = veiculo.motorista_atual
-        
-        # Verificar se motorista pode ver
-        if not request.user.is_staff:
-            try:
-                motorista = Motorista.objects.get(usuario=request.user)
-                if motorista_atual != motorista:
-                    return Response(
-                        {'error': 'Você só pode ver status do seu próprio veículo'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
-            except Motorista.DoesNotExist:
-                return Response(
-                    {'error': 'Motorista não encontrado'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        
-        rota_atual = veiculo.rotas.filter(status='em_andamento').first()
+
+        # rota_ativa_id e capacidade_disponivel vêm anotados do get_queryset
+        rota_atual = None
+        if veiculo.rota_ativa_id is not None:
+            rota_atual = Rota.objects.select_related(
+                'motorista__usuario', 'veiculo__motorista_atual__usuario'
+            ).prefetch_related(
+                'entregas__cliente', 'entregas__motorista__usuario'
+            ).get(pk=veiculo.rota_ativa_id)
         entregas_na_rota = rota_atual.entregas.all() if rota_atual else []
-        
+
         return Response({
             'veiculo': VeiculoSerializer(veiculo).data,
             'motorista_atual': MotoristaSerializer(motorista_atual).data if motorista_atual else None,
             'rota_atual': RotaSerializer(rota_atual).data if rota_atual else None,
             'entregas_na_rota': EntregaSerializer(entregas_na_rota, many=True).data,
-            'capacidade_disponivel': veiculo.capacidade_maxima - (rota_atual.capacidade_total_utilizada if rota_atual else 0),
+            'capacidade_disponivel': veiculo.capacidade_disponivel,
         })
 
 class EntregaViewSet(viewsets.ModelViewSet):
@@ -425,16 +479,28 @@ class EntregaViewSet(viewsets.ModelViewSet):
         # Evitar erro durante geração de schema do Swagger
         if getattr(self, 'swagger_fake_view', False):
             return Entrega.objects.none()
-            
-        queryset = super().get_queryset()
-        
+
+        # cliente_info/motorista_info/rota_info do serializer vêm no mesmo
+        # SELECT, evitando N+1 na listagem
+        queryset = super().get_queryset().select_related(
+            'cliente', 'motorista__usuario', 'rota'
+        )
+
+        if self.action == 'rastreamento':
+            # A árvore inteira do RastreamentoSerializer (rota com veículo e
+            # motorista, histórico com motorista) sai em duas consultas:
+            # o SELECT com JOINs + o prefetch do histórico
+            queryset = queryset.select_related(
+                'rota__veiculo', 'rota__motorista__usuario'
+            ).prefetch_related('historico__motorista__usuario')
+
         if not self.request.user.is_staff:
-            try:
-                motorista = Motorista.objects.get(usuario=self.request.user)
+            motorista = _get_request_motorista(self.request)
+            if motorista is not None:
                 queryset = queryset.filter(motorista=motorista)
-            except Motorista.DoesNotExist:
+            else:
                 queryset = queryset.none()
-        
+
         return queryset
     
     @action(detail=True, methods=['post'])
@@ -450,7 +516,10 @@ class EntregaViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            motorista = Motorista.objects.get(id=motorista_id, status__in=['ativo', 'disponivel'])
+            # A action só usa id e nome do motorista
+            motorista = Motorista.objects.only('id', 'nome').get(
+                id=motorista_id, status__in=['ativo', 'disponivel']
+            )
         except Motorista.DoesNotExist:
             return Response(
                 {'error': 'Motorista não encontrado ou não está disponível'},
@@ -458,15 +527,13 @@ class EntregaViewSet(viewsets.ModelViewSet):
             )
         
         entrega.motorista = motorista
-        entrega.save()
-        
-        # Registrar no histórico
-        HistoricoEntrega.objects.create(
-            entrega=entrega,
-            status_anterior=entrega.status,
-            status_novo=entrega.status,
+        entrega.save(update_fields=['motorista'])
+
+        # Registrar no histórico (auditoria, fora do caminho crítico)
+        registrar_historico_entrega(
+            entrega.pk, entrega.status, entrega.status,
             observacao=f'Motorista {motorista.nome} atribuído à entrega',
-            motorista=motorista
+            motorista_id=motorista.pk
         )
         
         return Response({
@@ -491,61 +558,138 @@ class EntregaViewSet(viewsets.ModelViewSet):
             
             status_anterior = entrega.status
             entrega.status = novo_status
-            
+
             # Se foi entregue, atualizar data_real
             if novo_status == 'entregue' and not entrega.data_entrega_real:
                 entrega.data_entrega_real = timezone.now()
-            
-            entrega.save()
-            
-            # Registrar no histórico
-            HistoricoEntrega.objects.create(
-                entrega=entrega,
-                status_anterior=status_anterior,
-                status_novo=novo_status,
-                observacao=observacao,
-                motorista=entrega.motorista
+
+            # Caminho de escrita compacto: UPDATE direto sem passar pelo
+            # save() completo da entrega. O histórico é auditoria pura e
+            # sai do caminho crítico via tasks.registrar_historico_entrega
+            Entrega.objects.filter(pk=entrega.pk).update(
+                status=entrega.status,
+                data_entrega_real=entrega.data_entrega_real
             )
-            
+            registrar_historico_entrega(
+                entrega.pk, status_anterior, novo_status,
+                observacao=observacao, motorista_id=entrega.motorista_id
+            )
+
+            # update()/bulk_create() não disparam post_save, então a
+            # invalidação do rastreamento público é feita aqui
+            cache.delete_many([
+                f'rastreio:{entrega.codigo_rastreio}',
+                f'rastreio-publico:{entrega.codigo_rastreio}',
+            ])
+
             return Response({
                 'message': f'Status da entrega atualizado para {novo_status}',
                 'entrega': EntregaSerializer(entrega).data
             })
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    @action(detail=True, methods=['get'])
-    def rastreamento(self, request, pk=None):
-        """Motorista vê apenas rastreamento de suas entregas, admin vê todas"""
-        entrega = self.get_object()
-        
-        # Verificar permissão
-        if not request.user.is_staff:
+
+    @action(detail=False, methods=['put'])
+    def atualizar_status_bulk(self, request):
+        """
+        Atualiza o status de várias entregas de uma vez. Para um lote de N
+        atualizações são executadas 2 instruções (bulk_update + bulk_create
+        do histórico) em vez de 2N round-trips
+        """
+        atualizacoes = request.data.get('atualizacoes')
+
+        if not isinstance(atualizacoes, list) or not atualizacoes:
+            return Response(
+                {'error': 'Lista de atualizações é obrigatória'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        status_validos = {choice[0] for choice in StatusEntrega.choices}
+        por_id = {}
+        for item in atualizacoes:
+            entrega_id = item.get('entrega_id')
+            novo_status = item.get('status')
+            if not entrega_id:
+                return Response(
+                    {'error': 'entrega_id é obrigatório em cada atualização'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            # Aceita id numérico ou string (como as demais actions); o
+            # dicionário precisa da chave coerida para casar com entrega.id
             try:
-                motorista = Motorista.objects.get(usuario=request.user)
-                if entrega.motorista != motorista:
-                    return Response(
-                        {'error': 'Você só pode rastrear suas próprias entregas'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
-            except Motorista.DoesNotExist:
+                entrega_id = int(entrega_id)
+            except (TypeError, ValueError):
                 return Response(
-                    {'error': 'Motorista não encontrado'},
-                    status=status.HTTP_403_FORBIDDEN
+                    {'error': f'entrega_id inválido: {entrega_id}'},
+                    status=status.HTTP_400_BAD_REQUEST
                 )
-        
+            if novo_status not in status_validos:
+                return Response(
+                    {'error': f'Status inválido: {novo_status}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            por_id[entrega_id] = item
+
+        # get_queryset já restringe às entregas do motorista autenticado
+        entregas = list(self.get_queryset().filter(id__in=por_id))
+        if len(entregas) != len(por_id):
+            return Response(
+                {'error': 'Uma ou mais entregas não foram encontradas'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        agora = timezone.now()
+        historicos = []
+        for entrega in entregas:
+            item = por_id[entrega.id]
+            status_anterior = entrega.status
+            entrega.status = item['status']
+            if entrega.status == 'entregue' and not entrega.data_entrega_real:
+                entrega.data_entrega_real = agora
+            historicos.append(HistoricoEntrega(
+                entrega=entrega,
+                status_anterior=status_anterior,
+                status_novo=entrega.status,
+                observacao=item.get('observacao', ''),
+                motorista_id=entrega.motorista_id
+            ))
+
+        with transaction.atomic():
+            Entrega.objects.bulk_update(entregas, fields=['status', 'data_entrega_real'])
+            HistoricoEntrega.objects.bulk_create(historicos)
+
+        # bulk_update/bulk_create não disparam post_save
+        cache.delete_many([
+            chave
+            for entrega in entregas
+            for chave in (
+                f'rastreio:{entrega.codigo_rastreio}',
+                f'rastreio-publico:{entrega.codigo_rastreio}',
+            )
+        ])
+
+        return Response({
+            'message': f'{len(entregas)} entregas atualizadas',
+            'entregas': EntregaSerializer(entregas, many=True).data
+        })
+
+    @action(detail=True, methods=['get'])
+    def rastreamento(self, request, pk=None):
+        """Motorista vê apenas rastreamento de suas entregas, admin vê todas.
+        O queryset já restringe às entregas do motorista, então get_object()
+        devolve 404 para entregas de terceiros"""
+        entrega = self.get_object()
+
         rota = entrega.rota
         veiculo = rota.veiculo if rota else None
         motorista = rota.motorista if rota else entrega.motorista
         historico = entrega.historico.all()
         
-        # Encontrar próxima entrega na rota
+        # Encontrar próxima entrega na rota: uma consulta pelo índice de PK,
+        # sem materializar todas as entregas da rota em memória
         proxima_entrega = None
         if rota:
-            entregas_rota = rota.entregas.order_by('id')
-            current_index = list(entregas_rota).index(entrega) if entrega in entregas_rota else -1
-            if current_index >= 0 and current_index + 1 < len(entregas_rota):
-                proxima_entrega = entregas_rota[current_index + 1]
+            proxima_entrega = rota.entregas.filter(id__gt=entrega.id).order_by('id').first()
         
         data = {
             'entrega': entrega,
@@ -570,28 +714,41 @@ class EntregaViewSet(viewsets.ModelViewSet):
         Rastreamento público (sem autenticação para código de rastreio)
         """
         codigo = request.query_params.get('codigo', '').upper()
-        
+
         if not codigo:
             return Response(
                 {'error': 'Código de rastreio é obrigatório'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
+
+        # Endpoint público e idempotente, tipicamente consultado em rajadas
+        # pelo destinatário: resposta cacheada por 60s absorve o polling.
+        # A chave é invalidada quando a entrega ou seu histórico mudam
+        cache_key = f'rastreio:{codigo}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return Response(cached)
+
         try:
-            entrega = Entrega.objects.get(codigo_rastreio=codigo)
+            # select_related evita consultas extras do serializer para
+            # cliente_info/motorista_info (N+1)
+            entrega = Entrega.objects.select_related(
+                'cliente', 'motorista__usuario', 'rota'
+            ).get(codigo_rastreio=codigo)
         except Entrega.DoesNotExist:
             return Response(
                 {'error': 'Entrega não encontrada'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        
+
         # Incluir histórico na resposta
         serializer = self.get_serializer(entrega)
         response_data = serializer.data
-        historico = HistoricoEntrega.objects.filter(entrega=entrega)
+        historico = HistoricoEntrega.objects.filter(entrega=entrega).select_related('motorista__usuario')
         historico_serializer = HistoricoEntregaSerializer(historico, many=True)
         response_data['historico'] = historico_serializer.data
-        
+
+        cache.set(cache_key, response_data, timeout=60)
         return Response(response_data)
 
 class RotaViewSet(viewsets.ModelViewSet):
@@ -601,28 +758,39 @@ class RotaViewSet(viewsets.ModelViewSet):
     filterset_fields = ['status', 'motorista', 'veiculo']
     search_fields = ['nome', 'descricao']
     
+    # Tabelas de despacho por action: lookup O(1) no lugar das cadeias
+    # if/elif avaliadas a cada request
+    _SERIALIZER_BY_ACTION = {
+        'create': RotaCreateSerializer,
+        'update': RotaUpdateSerializer,
+        'partial_update': RotaUpdateSerializer,
+    }
+    _PERMISSIONS_BY_ACTION = {
+        # Administradores: CRUD completo e gestão das entregas da rota
+        'create': (IsAuthenticated, IsAdministrador),
+        'update': (IsAuthenticated, IsAdministrador),
+        'partial_update': (IsAuthenticated, IsAdministrador),
+        'destroy': (IsAuthenticated, IsAdministrador),
+        'adicionar_entrega': (IsAuthenticated, IsAdministrador),
+        'adicionar_entregas_bulk': (IsAuthenticated, IsAdministrador),
+        'remover_entrega': (IsAuthenticated, IsAdministrador),
+        # Motoristas: apenas ver suas rotas e iniciar/concluir
+        'retrieve': (IsAuthenticated, IsAdministradorOuMotoristaDaRota),
+        'list': (IsAuthenticated, IsAdministradorOuMotoristaDaRota),
+        'entregas': (IsAuthenticated, IsAdministradorOuMotoristaDaRota),
+        'capacidade': (IsAuthenticated, IsAdministradorOuMotoristaDaRota),
+        'dashboard': (IsAuthenticated, IsAdministradorOuMotoristaDaRota),
+        'iniciar_rota': (IsAuthenticated, IsAdministradorOuMotoristaDaRota),
+        'concluir_rota': (IsAuthenticated, IsAdministradorOuMotoristaDaRota),
+    }
+
     def get_serializer_class(self):
-        if self.action == 'create':
-            return RotaCreateSerializer
-        elif self.action in ['update', 'partial_update']:
-            return RotaUpdateSerializer
-        return RotaSerializer
-    
+        return self._SERIALIZER_BY_ACTION.get(self.action, RotaSerializer)
+
     def get_permissions(self):
-        """
-        Administradores: CRUD completo
-        Motoristas: Apenas ver suas rotas e iniciar/concluir
-        """
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
-            permission_classes = [IsAuthenticated, IsAdministrador]
-        elif self.action in ['adicionar_entrega', 'remover_entrega']:
-            permission_classes = [IsAuthenticated, IsAdministrador]
-        elif self.action in ['retrieve', 'list', 'entregas', 'capacidade', 'dashboard']:
-            permission_classes = [IsAuthenticated, IsAdministradorOuMotoristaDaRota]
-        elif self.action in ['iniciar_rota', 'concluir_rota']:
-            permission_classes = [IsAuthenticated, IsAdministradorOuMotoristaDaRota]
-        else:
-            permission_classes = [IsAuthenticated]
+        permission_classes = self._PERMISSIONS_BY_ACTION.get(
+            self.action, (IsAuthenticated,)
+        )
         return [permission() for permission in permission_classes]
     
     def get_queryset(self):
@@ -633,17 +801,21 @@ class RotaViewSet(viewsets.ModelViewSet):
         if getattr(self, 'swagger_fake_view', False):
             return Rota.objects.none()
             
-        queryset = super().get_queryset()
-        
+        # RotaSerializer aninha motorista, veículo e entregas (com cliente e
+        # motorista de cada entrega): carregar tudo aqui evita N+1 na listagem
+        queryset = super().get_queryset().select_related(
+            'motorista__usuario', 'veiculo__motorista_atual__usuario'
+        ).prefetch_related('entregas__cliente', 'entregas__motorista__usuario')
+
         if not self.request.user.is_staff:
-            try:
-                motorista = Motorista.objects.get(usuario=self.request.user)
+            motorista = _get_request_motorista(self.request)
+            if motorista is not None:
                 queryset = queryset.filter(motorista=motorista)
-            except Motorista.DoesNotExist:
+            else:
                 queryset = queryset.none()
-        
+
         return queryset
-    
+
     def create(self, request, *args, **kwargs):
         """Apenas admin pode criar rotas"""
         serializer = self.get_serializer(data=request.data)
@@ -657,7 +829,7 @@ class RotaViewSet(viewsets.ModelViewSet):
         if entregas_ids:
             rota.entregas.set(entregas_ids)
             rota.capacidade_total_utilizada = rota.calcular_capacidade_utilizada()
-            rota.save()
+            rota.save(update_fields=['capacidade_total_utilizada'])
         
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
@@ -667,21 +839,6 @@ class RotaViewSet(viewsets.ModelViewSet):
         """Motorista vê entregas apenas de suas rotas"""
         rota = self.get_object()
         
-        # Verificar se motorista pode ver (própria rota ou admin)
-        if not request.user.is_staff:
-            try:
-                motorista = Motorista.objects.get(usuario=request.user)
-                if rota.motorista != motorista:
-                    return Response(
-                        {'error': 'Você só pode ver entregas das suas rotas'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
-            except Motorista.DoesNotExist:
-                return Response(
-                    {'error': 'Motorista não encontrado'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        
         entregas = rota.entregas.all()
         serializer = EntregaSerializer(entregas, many=True)
         return Response(serializer.data)
@@ -714,15 +871,14 @@ class RotaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Adicionar entrega à rota
-        rota.entregas.add(entrega)
-        entrega.rota = rota
-        entrega.save()
-        
-        # Atualizar capacidade
-        rota.capacidade_total_utilizada = rota.calcular_capacidade_utilizada()
-        rota.save()
-        
+        # Adicionar entrega à rota; o signal de m2m_changed regrava a
+        # capacidade denormalizada, sem reagregar nada aqui na view
+        with transaction.atomic():
+            rota.entregas.add(entrega)
+            entrega.rota = rota
+            entrega.save(update_fields=['rota'])
+        rota.refresh_from_db(fields=['capacidade_total_utilizada'])
+
         return Response({
             'message': f'Entrega {entrega.codigo_rastreio} adicionada à rota',
             'capacidade_utilizada': rota.capacidade_total_utilizada,
@@ -749,40 +905,67 @@ class RotaViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Remover entrega da rota
-        rota.entregas.remove(entrega)
-        entrega.rota = None
-        entrega.save()
-        
-        # Atualizar capacidade
-        rota.capacidade_total_utilizada = rota.calcular_capacidade_utilizada()
-        rota.save()
-        
+        # Remover entrega da rota; a capacidade denormalizada é regravada
+        # pelo signal de m2m_changed
+        with transaction.atomic():
+            rota.entregas.remove(entrega)
+            entrega.rota = None
+            entrega.save(update_fields=['rota'])
+        rota.refresh_from_db(fields=['capacidade_total_utilizada'])
+
         return Response({
             'message': f'Entrega {entrega.codigo_rastreio} removida da rota',
             'capacidade_utilizada': rota.capacidade_total_utilizada
         })
-    
+
+    @action(detail=True, methods=['post'])
+    def adicionar_entregas_bulk(self, request, pk=None):
+        """Apenas admin pode adicionar várias entregas à rota de uma vez"""
+        rota = self.get_object()
+        entrega_ids = request.data.get('entrega_ids')
+
+        if not entrega_ids:
+            return Response(
+                {'error': 'Lista de IDs de entregas é obrigatória'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        entregas = list(
+            Entrega.objects.only('id', 'capacidade_necessaria').filter(id__in=entrega_ids)
+        )
+        if len(entregas) != len(set(entrega_ids)):
+            return Response(
+                {'error': 'Uma ou mais entregas não foram encontradas'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # Verificar capacidade do lote inteiro antes de gravar
+        capacidade_lote = sum(e.capacidade_necessaria for e in entregas)
+        capacidade_futura = rota.capacidade_total_utilizada + capacidade_lote
+        if rota.veiculo and capacidade_futura > rota.veiculo.capacidade_maxima:
+            return Response(
+                {'error': 'Capacidade máxima do veículo excedida'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Duas instruções para o lote todo: m2m em lote e UPDATE das
+        # entregas; o signal de m2m_changed regrava a capacidade
+        with transaction.atomic():
+            rota.entregas.add(*entregas)
+            Entrega.objects.filter(id__in=[e.id for e in entregas]).update(rota=rota)
+        rota.refresh_from_db(fields=['capacidade_total_utilizada'])
+
+        return Response({
+            'message': f'{len(entregas)} entrega(s) adicionada(s) à rota',
+            'capacidade_utilizada': rota.capacidade_total_utilizada,
+            'capacidade_disponivel': rota.veiculo.capacidade_maxima - rota.capacidade_total_utilizada if rota.veiculo else 0
+        })
+
     @action(detail=True, methods=['get'])
     def capacidade(self, request, pk=None):
         """Motorista vê capacidade apenas de suas rotas"""
         rota = self.get_object()
         
-        # Verificar se motorista pode ver (própria rota ou admin)
-        if not request.user.is_staff:
-            try:
-                motorista = Motorista.objects.get(usuario=request.user)
-                if rota.motorista != motorista:
-                    return Response(
-                        {'error': 'Você só pode ver capacidade das suas rotas'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
-            except Motorista.DoesNotExist:
-                return Response(
-                    {'error': 'Motorista não encontrado'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        
         capacidade_disponivel = 0
         if rota.veiculo:
             capacidade_disponivel = rota.veiculo.capacidade_maxima - rota.capacidade_total_utilizada
@@ -802,39 +985,41 @@ class RotaViewSet(viewsets.ModelViewSet):
         """Motorista vê dashboard apenas de suas rotas"""
         rota = self.get_object()
         
-        # Verificar se motorista pode ver (própria rota ou admin)
-        if not request.user.is_staff:
-            try:
-                motorista = Motorista.objects.get(usuario=request.user)
-                if rota.motorista != motorista:
-                    return Response(
-                        {'error': 'Você só pode ver dashboard das suas rotas'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
-            except Motorista.DoesNotExist:
-                return Response(
-                    {'error': 'Motorista não encontrado'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        
-        entregas = rota.entregas.all()
+        # Materializa uma vez (o prefetch do get_queryset já trouxe as
+        # entregas); serialização reutiliza a mesma lista
+        entregas = list(rota.entregas.all())
         motorista = rota.motorista
         veiculo = rota.veiculo
-        
-        # Estatísticas das entregas
+
+        # Estatísticas das entregas: as linhas já estão em memória pelo
+        # prefetch, então as contagens saem de um Counter em Python, sem
+        # nenhuma consulta extra
+        por_status = Counter(e.status for e in entregas)
         estatisticas_entregas = {
-            'total': entregas.count(),
-            'pendentes': entregas.filter(status='pendente').count(),
-            'em_transito': entregas.filter(status='em_transito').count(),
-            'entregues': entregas.filter(status='entregue').count(),
-            'canceladas': entregas.filter(status='cancelada').count(),
+            'total': len(entregas),
+            'pendentes': por_status['pendente'],
+            'em_transito': por_status['em_transito'],
+            'entregues': por_status['entregue'],
+            'canceladas': por_status['cancelada'],
         }
-        
+
         return Response({
             'rota': RotaSerializer(rota).data,
             'motorista': MotoristaSerializer(motorista).data if motorista else None,
             'veiculo': VeiculoSerializer(veiculo).data if veiculo else None,
-            'entregas': EntregaSerializer(entregas, many=True).data,
+            # Projeção manual sobre a lista já prefetchada: só as colunas
+            # que o dashboard mostra, sem serializer completo nem query nova
+            'entregas': [
+                {
+                    'id': e.id,
+                    'codigo_rastreio': e.codigo_rastreio,
+                    'status': e.status,
+                    'endereco_destino': e.endereco_destino,
+                    'data_entrega_prevista': e.data_entrega_prevista,
+                    'capacidade_necessaria': e.capacidade_necessaria,
+                }
+                for e in entregas
+            ],
             'estatisticas': estatisticas_entregas,
             'capacidade': {
                 'maxima': veiculo.capacidade_maxima if veiculo else 0,
@@ -855,21 +1040,6 @@ class RotaViewSet(viewsets.ModelViewSet):
         """Motorista pode iniciar apenas suas rotas"""
         rota = self.get_object()
         
-        # Verificar se motorista pode iniciar (própria rota ou admin)
-        if not request.user.is_staff:
-            try:
-                motorista = Motorista.objects.get(usuario=request.user)
-                if rota.motorista != motorista:
-                    return Response(
-                        {'error': 'Você só pode iniciar suas próprias rotas'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
-            except Motorista.DoesNotExist:
-                return Response(
-                    {'error': 'Motorista não encontrado'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        
         if rota.status != 'planejada':
             return Response(
                 {'error': 'Somente rotas planejadas podem ser iniciadas'},
@@ -884,10 +1054,25 @@ class RotaViewSet(viewsets.ModelViewSet):
         
         rota.status = 'em_andamento'
         rota.data_inicio = timezone.now()
-        rota.save()
-        
-        # Atualizar status das entregas
-        rota.entregas.filter(status='pendente').update(status='em_transito')
+
+        # Iniciar a rota e transicionar as entregas é uma operação só: sem
+        # a transação, uma falha no UPDATE deixaria a rota em andamento com
+        # entregas ainda pendentes
+        codigos = list(
+            rota.entregas.filter(status='pendente')
+            .values_list('codigo_rastreio', flat=True)
+        )
+        with transaction.atomic():
+            rota.save(update_fields=['status', 'data_inicio'])
+            rota.entregas.filter(status='pendente').update(status='em_transito')
+
+        # update() não dispara post_save, então a invalidação do
+        # rastreamento público é feita aqui
+        cache.delete_many([
+            chave
+            for codigo in codigos
+            for chave in (f'rastreio:{codigo}', f'rastreio-publico:{codigo}')
+        ])
         
         return Response({
             'message': 'Rota iniciada com sucesso',
@@ -899,21 +1084,6 @@ class RotaViewSet(viewsets.ModelViewSet):
         """Motorista pode concluir apenas suas rotas"""
         rota = self.get_object()
         
-        # Verificar se motorista pode concluir (própria rota ou admin)
-        if not request.user.is_staff:
-            try:
-                motorista = Motorista.objects.get(usuario=request.user)
-                if rota.motorista != motorista:
-                    return Response(
-                        {'error': 'Você só pode concluir suas próprias rotas'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
-            except Motorista.DoesNotExist:
-                return Response(
-                    {'error': 'Motorista não encontrado'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        
         if rota.status != 'em_andamento':
             return Response(
                 {'error': 'Somente rotas em andamento podem ser concluídas'},
@@ -925,19 +1095,27 @@ class RotaViewSet(viewsets.ModelViewSet):
         
         rota.status = 'concluida'
         rota.data_conclusao = timezone.now()
-        
+        campos_alterados = ['status', 'data_conclusao']
+
         if km_real is not None:
             rota.km_total_real = km_real
-        
+            campos_alterados.append('km_total_real')
+
         if tempo_real is not None:
             rota.tempo_real_minutos = tempo_real
-        
-        rota.save()
-        
-        # Atualizar veículo
-        if rota.veiculo:
-            rota.veiculo.km_atual += Decimal(str(rota.km_total_real))
-            rota.veiculo.save()
+            campos_alterados.append('tempo_real_minutos')
+
+        # A ordem importa: Rota.save() propaga status para o veículo com um
+        # save() completo (km em memória, pré-incremento); o incremento de
+        # km entra depois com F(), atômico no banco e sem lost update sob
+        # concorrência
+        with transaction.atomic():
+            rota.save(update_fields=campos_alterados)
+
+            if rota.veiculo_id:
+                Veiculo.objects.filter(pk=rota.veiculo_id).update(
+                    km_atual=F('km_atual') + Decimal(str(rota.km_total_real or 0))
+                )
         
         return Response({
             'message': 'Rota concluída com sucesso',
@@ -969,52 +1147,93 @@ class RelatoriosView(generics.GenericAPIView):
             data_inicio = hoje - timedelta(days=30)
         else:  # hoje
             data_inicio = hoje
-        
-        # Estatísticas gerais
-        total_entregas = Entrega.objects.filter(
-            data_solicitacao__date__gte=data_inicio
-        ).count()
-        
-        entregas_concluidas = Entrega.objects.filter(
-            status='entregue',
-            data_solicitacao__date__gte=data_inicio
-        ).count()
-        
-        entregas_pendentes = Entrega.objects.filter(
-            status='pendente',
-            data_solicitacao__date__gte=data_inicio
-        ).count()
-        
-        # Motoristas ativos
-        motoristas_ativos = Motorista.objects.filter(status__in=['ativo', 'disponivel']).count()
-        motoristas_em_rota = Motorista.objects.filter(status='em_rota').count()
-        
-        # Veículos disponíveis
-        veiculos_disponiveis = Veiculo.objects.filter(status='disponivel').count()
-        veiculos_em_uso = Veiculo.objects.filter(status='em_uso').count()
-        
-        # Rotas ativas
-        rotas_ativas = Rota.objects.filter(status='em_andamento').count()
-        rotas_concluidas = Rota.objects.filter(
-            status='concluida',
-            data_rota__gte=data_inicio
-        ).count()
-        
-        # Capacidade utilizada
-        capacidade_utilizada = Rota.objects.filter(
-            status='em_andamento'
-        ).aggregate(total=Sum('capacidade_total_utilizada'))['total'] or 0
-        
-        capacidade_total = Veiculo.objects.filter(
-            status='em_uso'
-        ).aggregate(total=Sum('capacidade_maxima'))['total'] or 0
-        
+
+        # O dashboard do admin faz polling destes números; a resposta fica
+        # 60s no cache por período (a data na chave descarta sozinha as
+        # entradas de dias anteriores) e é invalidada em qualquer escrita
+        # nos modelos agregados
+        cache_key = f'relatorios:{periodo}:{hoje.isoformat()}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return Response(cached)
+
+        # Para semana/mes, os dias já fechados saem da tabela de resumo
+        # (EstatisticaDiaria, alimentada pelo comando
+        # precalcular_estatisticas) e só a fatia de hoje é contada ao vivo.
+        # Sem resumo completo do período, cai no caminho de contagem direta
+        resumo = None
+        if periodo != 'hoje':
+            dias_fechados = (hoje - data_inicio).days
+            candidato = EstatisticaDiaria.objects.filter(
+                data__gte=data_inicio, data__lt=hoje
+            ).aggregate(
+                dias=Count('id'),
+                total=Coalesce(Sum('entregas_total'), 0),
+                concluidas=Coalesce(Sum('entregas_concluidas'), 0),
+                pendentes=Coalesce(Sum('entregas_pendentes'), 0),
+                rotas_concluidas=Coalesce(Sum('rotas_concluidas'), 0),
+            )
+            if candidato['dias'] == dias_fechados:
+                resumo = candidato
+        data_corte = hoje if resumo else data_inicio
+
+        # Um aggregate por modelo: os ~15 COUNTs/SUMs separados viram 4
+        # consultas com agregados condicionais (a view é dominada pela
+        # latência de round-trip, não pelo custo de cada contagem)
+        stats_entregas = Entrega.objects.aggregate(
+            total=Count('id', filter=Q(data_solicitacao__date__gte=data_corte)),
+            concluidas=Count('id', filter=Q(
+                status='entregue', data_solicitacao__date__gte=data_corte
+            )),
+            pendentes=Count('id', filter=Q(
+                status='pendente', data_solicitacao__date__gte=data_corte
+            )),
+            sem_motorista=Count('id', filter=Q(
+                status='pendente', motorista__isnull=True
+            )),
+            sem_rota=Count('id', filter=Q(status='pendente', rota__isnull=True)),
+        )
+        if resumo:
+            stats_entregas['total'] += resumo['total']
+            stats_entregas['concluidas'] += resumo['concluidas']
+            stats_entregas['pendentes'] += resumo['pendentes']
+        total_entregas = stats_entregas['total']
+        entregas_concluidas = stats_entregas['concluidas']
+
+        stats_motoristas = Motorista.objects.aggregate(
+            ativos=Count('id', filter=Q(status__in=['ativo', 'disponivel'])),
+            em_rota=Count('id', filter=Q(status='em_rota')),
+        )
+
+        stats_veiculos = Veiculo.objects.aggregate(
+            disponiveis=Count('id', filter=Q(status='disponivel')),
+            em_uso=Count('id', filter=Q(status='em_uso')),
+            em_manutencao=Count('id', filter=Q(status='manutencao')),
+            capacidade_total=Coalesce(
+                Sum('capacidade_maxima', filter=Q(status='em_uso')), 0
+            ),
+        )
+
+        stats_rotas = Rota.objects.aggregate(
+            ativas=Count('id', filter=Q(status='em_andamento')),
+            concluidas=Count('id', filter=Q(
+                status='concluida', data_rota__gte=data_corte
+            )),
+            capacidade_utilizada=Coalesce(
+                Sum('capacidade_total_utilizada', filter=Q(status='em_andamento')), 0
+            ),
+        )
+        if resumo:
+            stats_rotas['concluidas'] += resumo['rotas_concluidas']
+
+        capacidade_utilizada = stats_rotas['capacidade_utilizada']
+        capacidade_total = stats_veiculos['capacidade_total']
         percentual_capacidade = (
             (capacidade_utilizada / capacidade_total * 100)
             if capacidade_total > 0 else 0
         )
-        
-        return Response({
+
+        data = {
             'periodo': {
                 'inicio': data_inicio,
                 'fim': hoje,
@@ -1024,25 +1243,25 @@ class RelatoriosView(generics.GenericAPIView):
                 'entregas': {
                     'total': total_entregas,
                     'concluidas': entregas_concluidas,
-                    'pendentes': entregas_pendentes,
+                    'pendentes': stats_entregas['pendentes'],
                     'taxa_sucesso': (
                         (entregas_concluidas / total_entregas * 100)
                         if total_entregas > 0 else 0
                     ),
                 },
                 'motoristas': {
-                    'ativos': motoristas_ativos,
-                    'em_rota': motoristas_em_rota,
-                    'disponiveis': motoristas_ativos - motoristas_em_rota,
+                    'ativos': stats_motoristas['ativos'],
+                    'em_rota': stats_motoristas['em_rota'],
+                    'disponiveis': stats_motoristas['ativos'] - stats_motoristas['em_rota'],
                 },
                 'veiculos': {
-                    'disponiveis': veiculos_disponiveis,
-                    'em_uso': veiculos_em_uso,
-                    'em_manutencao': Veiculo.objects.filter(status='manutencao').count(),
+                    'disponiveis': stats_veiculos['disponiveis'],
+                    'em_uso': stats_veiculos['em_uso'],
+                    'em_manutencao': stats_veiculos['em_manutencao'],
                 },
                 'rotas': {
-                    'ativas': rotas_ativas,
-                    'concluidas': rotas_concluidas,
+                    'ativas': stats_rotas['ativas'],
+                    'concluidas': stats_rotas['concluidas'],
                 },
                 'capacidade': {
                     'utilizada': capacidade_utilizada,
@@ -1052,15 +1271,13 @@ class RelatoriosView(generics.GenericAPIView):
                 },
             },
             'alertas': {
-                'sem_motorista': Entrega.objects.filter(
-                    status='pendente', motorista__isnull=True
-                ).count(),
-                'sem_rota': Entrega.objects.filter(
-                    status='pendente', rota__isnull=True
-                ).count(),
-                'veiculos_manutencao': Veiculo.objects.filter(status='manutencao').count(),
+                'sem_motorista': stats_entregas['sem_motorista'],
+                'sem_rota': stats_entregas['sem_rota'],
+                'veiculos_manutencao': stats_veiculos['em_manutencao'],
             },
-        })
+        }
+        cache.set(cache_key, data, timeout=60)
+        return Response(data)
 
 
 
@@ -1071,9 +1288,8 @@ class DashboardMotoristaView(generics.GenericAPIView):
     serializer_class = DashboardMotoristaSerializer
     
     def get(self, request):
-        try:
-            motorista = Motorista.objects.get(usuario=request.user)
-        except Motorista.DoesNotExist:
+        motorista = _get_request_motorista(request)
+        if motorista is None:
             return Response(
                 {'error': 'Motorista não encontrado para este usuário'},
                 status=status.HTTP_404_NOT_FOUND
@@ -1081,28 +1297,43 @@ class DashboardMotoristaView(generics.GenericAPIView):
         
         hoje = timezone.now().date()
         
-        # Buscar dados
+        # Buscar dados. As listas do dashboard projetam com values() só as
+        # colunas que a tela usa, em vez de serializers completos que
+        # carregam cliente/motorista aninhados para cada linha
         veiculo_atual = motorista.veiculos_associados.filter(status='em_uso').first()
         rotas_ativas = motorista.rotas.filter(status='em_andamento')
-        entregas_hoje = motorista.entregas.filter(data_entrega_prevista=hoje)
+        entregas_hoje = list(
+            motorista.entregas.filter(data_entrega_prevista=hoje).values(
+                'id', 'codigo_rastreio', 'status', 'endereco_destino',
+                'data_entrega_prevista', 'capacidade_necessaria',
+            )
+        )
         
-        # Estatísticas
-        total_entregas = motorista.entregas.count()
-        entregas_pendentes = motorista.entregas.filter(status='pendente').count()
-        entregas_concluidas = motorista.entregas.filter(status='entregue').count()
+        # Estatísticas: as três contagens saem numa única consulta com
+        # agregados condicionais, em vez de três COUNTs separados
+        stats = motorista.entregas.aggregate(
+            total=Count('id'),
+            pendentes=Count('id', filter=Q(status='pendente')),
+            concluidas=Count('id', filter=Q(status='entregue')),
+        )
         capacidade_utilizada = rotas_ativas.aggregate(
             total=Coalesce(Sum('capacidade_total_utilizada'), 0)
         )['total'] or 0
-        
+
         # Cria um dicionário com os dados serializados
         data = {
             'motorista': MotoristaSerializer(motorista).data,
             'veiculo_atual': VeiculoSerializer(veiculo_atual).data if veiculo_atual else None,
-            'rotas_ativas': RotaSerializer(rotas_ativas, many=True).data,
-            'entregas_hoje': EntregaSerializer(entregas_hoje, many=True).data if entregas_hoje.exists() else [],
-            'total_entregas': total_entregas,
-            'entregas_pendentes': entregas_pendentes,
-            'entregas_concluidas': entregas_concluidas,
+            'rotas_ativas': list(
+                rotas_ativas.values(
+                    'id', 'nome', 'status', 'data_rota', 'veiculo_id',
+                    'capacidade_total_utilizada',
+                )
+            ),
+            'entregas_hoje': entregas_hoje,
+            'total_entregas': stats['total'],
+            'entregas_pendentes': stats['pendentes'],
+            'entregas_concluidas': stats['concluidas'],
             'capacidade_utilizada': capacidade_utilizada,
         }
         
@@ -1121,32 +1352,52 @@ class RastreamentoPublicoView(generics.GenericAPIView):
     )
     def get(self, request):
         codigo = request.query_params.get('codigo', '').upper()
-        
+
         if not codigo:
             return Response(
                 {'error': 'Código de rastreio é obrigatório'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
+
+        # Endpoint público e raspável: códigos quentes batem no cache por
+        # 60s em vez de no banco. Invalidado junto com rastreio:<codigo>
+        cache_key = f'rastreio-publico:{codigo}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return Response(cached)
+
         try:
-            entrega = Entrega.objects.get(codigo_rastreio=codigo)
+            # Mesmo padrão de por_codigo_rastreio: as relações do serializer
+            # vêm no SELECT da entrega e o histórico vem junto via Prefetch,
+            # já ordenado e com o motorista de cada linha
+            entrega = Entrega.objects.select_related(
+                'cliente', 'motorista__usuario', 'rota'
+            ).prefetch_related(
+                Prefetch(
+                    'historico',
+                    queryset=HistoricoEntrega.objects.select_related('motorista__usuario'),
+                    to_attr='historico_carregado',
+                )
+            ).get(codigo_rastreio=codigo)
         except Entrega.DoesNotExist:
             return Response(
                 {'error': 'Código de rastreio não encontrado'},
                 status=status.HTTP_404_NOT_FOUND
             )
-        
+
         serializer = EntregaSerializer(entrega)
-        
-        # Adicionar histórico
-        historico = HistoricoEntrega.objects.filter(entrega=entrega)
-        historico_serializer = HistoricoEntregaSerializer(historico, many=True)
-        
+
+        # Histórico já carregado pelo prefetch: serializa sem consulta extra
+        historico_serializer = HistoricoEntregaSerializer(
+            entrega.historico_carregado, many=True
+        )
+
         response_data = serializer.data
         response_data['historico'] = historico_serializer.data
-        
+
+        cache.set(cache_key, response_data, timeout=60)
         return Response(response_data)
-    
+
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     def validate(self, attrs):
@@ -1162,16 +1413,15 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             'is_superuser': user.is_superuser,
         }
         
-        # Adicionar informações do motorista se existir
-        try:
-            motorista = Motorista.objects.get(usuario=user)
-            data['user']['motorista'] = {
-                'id': motorista.id,
-                'nome': motorista.nome,
-                'status': motorista.status,
-            }
-        except Motorista.DoesNotExist:
-            data['user']['motorista'] = None
+        # Adicionar informações do motorista se existir; a resposta só usa
+        # três campos, então a consulta projeta apenas eles em vez de
+        # carregar o motorista inteiro a cada login
+        motorista = (
+            Motorista.objects.filter(usuario_id=user.id)
+            .values('id', 'nome', 'status')
+            .first()
+        )
+        data['user']['motorista'] = motorista
         
         return data
 
@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 from datetime import timedelta
@@ -11,6 +12,15 @@ SECRET_KEY = os.getenv('SECRET_KEY', 'django-insecure-dev-key-change-in-producti
 
 DEBUG = os.getenv('DEBUG', 'True') == 'True'
 
+TESTING = 'test' in sys.argv
+
+# Runner padrão, explícito para permitir --parallel/--buffer via manage.py
+TEST_RUNNER = 'django.test.runner.DiscoverRunner'
+
+# Criação automática de usuário para motoristas via signal (redundante com
+# Motorista.save(); desligada nos testes para evitar trabalho duplicado)
+CORE_AUTO_CRIAR_USUARIO_MOTORISTA = not TESTING
+
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1,sistema-logistica.onrender.com').split(',')
 
 INSTALLED_APPS = [